@@ -1,15 +1,42 @@
-from fastapi import FastAPI, HTTPException, Request
-from pydantic import BaseModel, Field
-from pydantic_settings import BaseSettings
-from typing import Optional, Dict, Any
-import logging
-import os
-from huggingface_hub import InferenceClient
-from src.tools.tourism_tools import hotel_tool
-from src.agents.tourism_agent import TourismAgent
-from src.routers.whatsapp import create_whatsapp_router
-from src.routers.telegram import create_telegram_router
-from src.agents.tourism_agent import TourismAgent
+from src.startup_timing import startup_timer
+
+with startup_timer.stage("import_web"):
+    from fastapi import BackgroundTasks, FastAPI, HTTPException, Request
+    from fastapi.responses import ORJSONResponse, PlainTextResponse, StreamingResponse
+    from pydantic import Field
+    from pydantic_settings import BaseSettings
+    from typing import Optional, Dict, Any
+    import asyncio
+    import logging
+    import orjson
+    import os
+
+# Heavy integrations (huggingface_hub, transformers, twilio, langchain,
+# firebase_admin) are imported only by the features that use them
+with startup_timer.stage("import_app"):
+    from src.agents.tourism_agent import TourismAgent
+    from src.agents.agent_holder import AgentHolder
+    from src.agents.completion_cache import CompletionCache
+    from src.agents.session_store import SessionStore
+    from src.agents.batch import BatchProcessor
+    from src.feedback.local_store import create_backend
+    from src.feedback.writer import FeedbackWriter
+    from src.tools import http_pool
+    from src.tools.hotel_providers import create_hotel_search
+    from src.tools.circuit_breaker import breaker_stats
+    from src.routers.admission import AdmissionController, AdmissionRejected
+    from src.routers.dedupe import WebhookDedupe
+    from src import metrics
+    from src.models.hotel_record import hotels_to_public
+    from src.models.chat_models import (
+        ChatRequest,
+        ChatResponse,
+        BatchChatRequest,
+        BatchItemResult,
+        BatchChatResponse,
+        FeedbackRequest,
+        FeedbackResponse
+    )
 
 # Configure logging
 logging.basicConfig(
@@ -18,15 +45,13 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Define request and response models FIRST
-class ChatRequest(BaseModel):
-    message: str
-    session_id: str = "default"
+# Fixed ids sent by many clients at once (older Gradio UIs send "gradio");
+# keeping memory for them would mix different users' conversations
+SHARED_SESSION_IDS = frozenset({"default", "gradio"})
 
-class ChatResponse(BaseModel):
-    response: str
-    session_id: str
-    status: str = "success"
+def session_key(session_id: str) -> Optional[str]:
+    """Map a web session_id to a memory key; shared ids get no memory"""
+    return None if session_id in SHARED_SESSION_IDS else f"web:{session_id}"
 
 class Settings(BaseSettings):
     huggingface_api_key: Optional[str] = Field(default=None, env="HUGGINGFACE_API_KEY")
@@ -35,6 +60,48 @@ class Settings(BaseSettings):
     twilio_account_sid: Optional[str] = Field(default=None, env="TWILIO_ACCOUNT_SID")
     twilio_auth_token: Optional[str] = Field(default=None, env="TWILIO_AUTH_TOKEN")
     firebase_credentials: Optional[str] = Field(default=None, env="FIREBASE_CREDENTIALS")
+    twilio_whatsapp_number: Optional[str] = Field(default=None, env="TWILIO_WHATSAPP_NUMBER")
+    whatsapp_async_replies: bool = Field(default=False, env="WHATSAPP_ASYNC_REPLIES")
+    whatsapp_fake_sender: bool = Field(default=False, env="WHATSAPP_FAKE_SENDER")
+    whatsapp_queue_size: int = Field(default=100, env="WHATSAPP_QUEUE_SIZE")
+    whatsapp_workers: int = Field(default=4, env="WHATSAPP_WORKERS")
+    inference_backend: str = Field(default="remote", env="INFERENCE_BACKEND")  # "remote" or "local"
+    local_max_batch_size: int = Field(default=8, env="LOCAL_MAX_BATCH_SIZE")
+    local_max_batch_wait_ms: float = Field(default=10.0, env="LOCAL_MAX_BATCH_WAIT_MS")
+    local_precision: str = Field(default="fp32", env="LOCAL_PRECISION")  # "fp32" or "int8"
+    local_quantized_path: Optional[str] = Field(default=None, env="LOCAL_QUANTIZED_PATH")
+    telegram_queue_size: int = Field(default=100, env="TELEGRAM_QUEUE_SIZE")
+    telegram_workers: int = Field(default=4, env="TELEGRAM_WORKERS")
+    llm_cache_max_entries: int = Field(default=1024, env="LLM_CACHE_MAX_ENTRIES")
+    llm_cache_ttl_seconds: float = Field(default=600.0, env="LLM_CACHE_TTL_SECONDS")
+    llm_cache_max_mb: float = Field(default=16.0, env="LLM_CACHE_MAX_MB")
+    session_max_turns: int = Field(default=6, env="SESSION_MAX_TURNS")
+    session_max_sessions: int = Field(default=100_000, env="SESSION_MAX_SESSIONS")
+    session_max_mb: float = Field(default=64.0, env="SESSION_MAX_MB")
+    session_idle_ttl_seconds: float = Field(default=1800.0, env="SESSION_IDLE_TTL_SECONDS")
+    session_history_tokens: int = Field(default=256, env="SESSION_HISTORY_TOKENS")
+    batch_max_items: int = Field(default=5000, env="BATCH_MAX_ITEMS")
+    batch_default_parallelism: int = Field(default=8, env="BATCH_DEFAULT_PARALLELISM")
+    batch_max_parallelism: int = Field(default=32, env="BATCH_MAX_PARALLELISM")
+    # Comma-separated channels (web, telegram, whatsapp, batch) that answer hotel
+    # searches with an instant templated list and send the LLM summary afterwards
+    hotel_template_channels: str = Field(default="", env="HOTEL_TEMPLATE_CHANNELS")
+    hotel_providers: str = Field(default="makcorps,simulated", env="HOTEL_PROVIDERS")  # priority order
+    hotel_search_deadline_seconds: float = Field(default=5.0, env="HOTEL_SEARCH_DEADLINE_SECONDS")
+    hotel_hedge_quantile: float = Field(default=0.95, env="HOTEL_HEDGE_QUANTILE")
+    reload_drain_timeout_seconds: float = Field(default=30.0, env="RELOAD_DRAIN_TIMEOUT_SECONDS")
+    feedback_backend: str = Field(default="auto", env="FEEDBACK_BACKEND")  # "auto", "firebase", "jsonl" or "sqlite"
+    feedback_path: Optional[str] = Field(default=None, env="FEEDBACK_PATH")
+    feedback_journal_path: Optional[str] = Field(default="data/feedback.journal", env="FEEDBACK_JOURNAL_PATH")
+    feedback_max_batch: int = Field(default=100, env="FEEDBACK_MAX_BATCH")
+    feedback_flush_interval_seconds: float = Field(default=5.0, env="FEEDBACK_FLUSH_INTERVAL_SECONDS")
+    rate_limit_per_minute: float = Field(default=20.0, env="RATE_LIMIT_PER_MINUTE")  # per session/chat/number
+    rate_limit_burst: int = Field(default=5, env="RATE_LIMIT_BURST")
+    max_in_flight_generations: int = Field(default=32, env="MAX_IN_FLIGHT_GENERATIONS")
+    admission_max_queue: int = Field(default=64, env="ADMISSION_MAX_QUEUE")
+    admission_queue_timeout_seconds: float = Field(default=10.0, env="ADMISSION_QUEUE_TIMEOUT_SECONDS")
+    webhook_dedupe_ttl_seconds: float = Field(default=600.0, env="WEBHOOK_DEDUPE_TTL_SECONDS")
+    webhook_dedupe_max_entries: int = Field(default=10_000, env="WEBHOOK_DEDUPE_MAX_ENTRIES")
 
     class Config:
         env_file = ".env"
@@ -42,7 +109,8 @@ class Settings(BaseSettings):
 
 # Initialize settings
 try:
-    settings = Settings()
+    with startup_timer.stage("settings"):
+        settings = Settings()
     logger.info("Settings loaded successfully")
     logger.info(f"HuggingFace API key present: {bool(settings.huggingface_api_key)}")
     logger.info(f"MakCorps API key present: {bool(settings.makcorps_api_key)}")
@@ -61,40 +129,272 @@ if not settings.huggingface_api_key or not settings.makcorps_api_key:
 app = FastAPI(
     title="Tourism Chat Assistant",
     description="Chat interface using MT5 model for tourism assistance",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
-# Initialize HuggingFace client
-try:
-    client = InferenceClient(
-        "ArsenKe/MT5_large_finetuned_chatbot",
-        token=settings.huggingface_api_key
+def create_llm_clients():
+    """Build the (sync, async) LLM clients for the configured inference backend"""
+    if settings.inference_backend == "local":
+        from src.config import ModelConfig
+
+        model_config = ModelConfig(
+            max_batch_size=settings.local_max_batch_size,
+            max_batch_wait_ms=settings.local_max_batch_wait_ms,
+            precision=settings.local_precision,
+            quantized_path=settings.local_quantized_path
+        )
+        # The local backend batches across threads; the agent calls it via to_thread
+        return model_config.create_local_backend(), None
+
+    from huggingface_hub import AsyncInferenceClient, InferenceClient
+
+    return (
+        InferenceClient("ArsenKe/MT5_large_finetuned_chatbot", token=settings.huggingface_api_key),
+        AsyncInferenceClient("ArsenKe/MT5_large_finetuned_chatbot", token=settings.huggingface_api_key)
     )
-    logger.info("HuggingFace client initialized successfully")
+
+# Completion cache is shared across agent reloads
+completion_cache = CompletionCache(
+    max_entries=settings.llm_cache_max_entries,
+    ttl=settings.llm_cache_ttl_seconds,
+    max_bytes=int(settings.llm_cache_max_mb * 1024 * 1024)
+)
+
+# Conversation memory, keyed by session_id / Telegram chat / WhatsApp number
+session_store = SessionStore(
+    max_turns=settings.session_max_turns,
+    max_sessions=settings.session_max_sessions,
+    max_bytes=int(settings.session_max_mb * 1024 * 1024),
+    idle_ttl=settings.session_idle_ttl_seconds
+)
+
+# Hotel providers are queried concurrently; shared across agent reloads
+hotel_search = create_hotel_search(
+    [name.strip() for name in settings.hotel_providers.split(",") if name.strip()],
+    deadline=settings.hotel_search_deadline_seconds,
+    hedge_quantile=settings.hotel_hedge_quantile
+)
+
+def build_agent(generation: int = 0) -> TourismAgent:
+    """Create a TourismAgent on fresh LLM clients; used at startup and on reload"""
+    client, async_client = create_llm_clients()
+    return TourismAgent(
+        llm_client=client,
+        hotel_api=hotel_search,
+        async_llm_client=async_client,
+        completion_cache=completion_cache,
+        session_store=session_store,
+        history_token_budget=settings.session_history_tokens,
+        model_revision=str(generation),
+        template_channels=[c.strip() for c in settings.hotel_template_channels.split(",") if c.strip()]
+    )
+
+# Initialize HuggingFace client and agent. Every entry point goes through the
+# holder, so a reload swaps the agent for all channels at once.
+try:
+    with startup_timer.stage("llm_client"):
+        agent = AgentHolder(build_agent(), drain_timeout=settings.reload_drain_timeout_seconds)
+    logger.info(f"LLM client initialized successfully ({settings.inference_backend} backend)")
 except Exception as e:
     logger.error(f"Failed to initialize HuggingFace client: {str(e)}")
     raise
 
-# Initialize agent after creating client
-agent = TourismAgent(llm_client=client, hotel_api=None)
+# Feedback is buffered and flushed in batches by a background thread
+with startup_timer.stage("feedback"):
+    feedback_writer = FeedbackWriter(
+        create_backend(settings.feedback_backend, settings.feedback_path),
+        journal_path=settings.feedback_journal_path,
+        max_batch=settings.feedback_max_batch,
+        flush_interval=settings.feedback_flush_interval_seconds
+    )
+
+# Per-sender rate limits and the global cap on in-flight generations,
+# shared by /chat, /chat/stream and the Telegram and WhatsApp webhooks
+admission = AdmissionController(
+    rate_per_minute=settings.rate_limit_per_minute,
+    burst=settings.rate_limit_burst,
+    max_in_flight=settings.max_in_flight_generations,
+    max_queue=settings.admission_max_queue,
+    queue_timeout=settings.admission_queue_timeout_seconds
+)
+
+# Telegram update_ids and Twilio MessageSids seen recently; redeliveries are not reprocessed
+webhook_dedupe = {
+    channel: WebhookDedupe(
+        channel,
+        ttl=settings.webhook_dedupe_ttl_seconds,
+        max_entries=settings.webhook_dedupe_max_entries
+    )
+    for channel in ("telegram", "whatsapp")
+}
 
-# Register routers with the shared agent
-app.include_router(create_whatsapp_router(agent))
-app.include_router(create_telegram_router(agent))
+def whatsapp_router_options() -> Dict[str, Any]:
+    """Router options for WhatsApp, including the REST sender for async replies"""
+    options = {
+        "queue_size": settings.whatsapp_queue_size,
+        "concurrency": settings.whatsapp_workers,
+        "admission": admission,
+        "dedupe": webhook_dedupe["whatsapp"]
+    }
+    if not settings.whatsapp_async_replies:
+        return options
+    from src.routers.twilio_sender import FakeSender, TwilioSender
+
+    if settings.whatsapp_fake_sender:
+        return {**options, "async_replies": True, "sender": FakeSender()}
+    if settings.twilio_account_sid and settings.twilio_auth_token and settings.twilio_whatsapp_number:
+        sender = TwilioSender(
+            settings.twilio_account_sid,
+            settings.twilio_auth_token,
+            settings.twilio_whatsapp_number
+        )
+        return {**options, "async_replies": True, "sender": sender}
+    logger.warning("WHATSAPP_ASYNC_REPLIES set without Twilio credentials/number; using inline TwiML replies")
+    return options
+
+# Register each enabled channel router exactly once
+with startup_timer.stage("routers"):
+    if settings.telegram_token:
+        from src.routers.telegram import create_telegram_router
+        app.include_router(create_telegram_router(
+            agent,
+            queue_size=settings.telegram_queue_size,
+            concurrency=settings.telegram_workers,
+            admission=admission,
+            dedupe=webhook_dedupe["telegram"]
+        ))
+        logger.info("Telegram bot enabled")
+
+    if settings.twilio_account_sid and settings.twilio_auth_token:
+        from src.routers.whatsapp import create_whatsapp_router
+        app.include_router(create_whatsapp_router(agent, **whatsapp_router_options()))
+        logger.info("WhatsApp integration enabled")
+
+@app.on_event("startup")
+async def report_startup_time():
+    feedback_writer.start()
+    startup_timer.mark_ready()
+    startup_timer.log_report()
+
+@app.on_event("shutdown")
+async def close_http_pools():
+    await asyncio.to_thread(feedback_writer.close)
+    await http_pool.aclose_all()
+
+def admit_web(request: ChatRequest, http_request: Request) -> None:
+    """Rate-limit a web message by session, or by client address for shared session ids
+
+    The client address is the real caller only when uvicorn trusts the
+    proxy's X-Forwarded-For (--proxy-headers and FORWARDED_ALLOW_IPS, set in
+    the Dockerfile); otherwise every anonymous user shares the proxy's bucket.
+    """
+    key = session_key(request.session_id)
+    if key is None:
+        key = f"web-ip:{http_request.client.host if http_request.client else 'unknown'}"
+    try:
+        admission.admit(key, "web")
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers=e.headers)
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(request: ChatRequest, http_request: Request):
+    admit_web(request, http_request)
     try:
-        result = agent.process_message(request.message)
+        async with admission.generation("web"):
+            result = await agent.aprocess_message(request.message, session_id=session_key(request.session_id))
         return ChatResponse(
             response=result["response"],
             session_id=request.session_id,
             # Optionally: hotels=result.get("hotels", [])
         )
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers=e.headers)
     except Exception as e:
         logger.error(f"Chat error: {str(e)}")
         raise HTTPException(status_code=500, detail="Processing error")
 
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest, http_request: Request):
+    """Stream the reply as Server-Sent Events (hotels, token..., [summary...,] done)"""
+    admit_web(request, http_request)
+
+    async def event_stream():
+        # The slot is taken inside the stream so it is always released with it
+        try:
+            async with admission.generation("web"):
+                async for event in agent.astream_message(request.message, session_id=session_key(request.session_id)):
+                    payload = event["data"]
+                    if event["event"] == "hotels":
+                        payload = hotels_to_public(payload)
+                    elif event["event"] == "done":
+                        payload = {**payload, "session_id": request.session_id}
+                    yield f"event: {event['event']}\ndata: {orjson.dumps(payload).decode()}\n\n"
+        except AdmissionRejected as e:
+            yield f"event: error\ndata: {orjson.dumps({'detail': str(e), 'status': e.status_code}).decode()}\n\n"
+        except Exception as e:
+            logger.error(f"Chat stream error: {str(e)}")
+            yield f"event: error\ndata: {orjson.dumps({'detail': 'Processing error'}).decode()}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/feedback", response_model=FeedbackResponse, status_code=202)
+async def feedback_endpoint(request: FeedbackRequest):
+    """Record a rating for a reply; stored in the background, never on the request path"""
+    try:
+        feedback_id = feedback_writer.record({
+            **request.model_dump(),
+            "model_revision": str(agent.generation)
+        })
+        return FeedbackResponse(id=feedback_id)
+    except Exception as e:
+        logger.error(f"Feedback error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Feedback processing error")
+
+def batch_processor(request: BatchChatRequest) -> BatchProcessor:
+    """Validate a batch request and build its processor"""
+    if len(request.items) > settings.batch_max_items:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {settings.batch_max_items} items")
+    parallelism = min(request.parallelism or settings.batch_default_parallelism, settings.batch_max_parallelism)
+    return BatchProcessor(agent, parallelism=parallelism, admission=admission)
+
+def batch_items(request: BatchChatRequest):
+    return ((item.message, session_key(item.session_id)) for item in request.items)
+
+def public_outcome(outcome: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert internal hotel records of a batch outcome to the public schema"""
+    if "hotels" in outcome:
+        outcome["hotels"] = hotels_to_public(outcome["hotels"])
+    return outcome
+
+@app.post("/chat/batch", response_model=BatchChatResponse)
+async def chat_batch_endpoint(request: BatchChatRequest):
+    """Process many messages concurrently; results come back in input order"""
+    processor = batch_processor(request)
+    results = []
+    async for outcome in processor.run(batch_items(request)):
+        public_outcome(outcome)
+        results.append(BatchItemResult(session_id=request.items[outcome["index"]].session_id, **outcome))
+    failed = sum(1 for r in results if r.status != "success")
+    return BatchChatResponse(results=results, succeeded=len(results) - failed, failed=failed)
+
+@app.post("/chat/batch/stream")
+async def chat_batch_stream_endpoint(request: BatchChatRequest):
+    """Like /chat/batch, but streams one NDJSON line per item as it completes in order"""
+    processor = batch_processor(request)
+
+    async def ndjson():
+        async for outcome in processor.run(batch_items(request)):
+            outcome["session_id"] = request.items[outcome["index"]].session_id
+            public_outcome(outcome)
+            yield orjson.dumps(outcome) + b"\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
 @app.get("/health", response_model=Dict[str, Any])
 async def health_check():
     return {
@@ -103,28 +403,37 @@ async def health_check():
         "integrations": {
             "telegram": bool(settings.telegram_token),
             "whatsapp": bool(settings.twilio_account_sid and settings.twilio_auth_token)
-        }
+        },
+        "llm_cache": completion_cache.stats(),
+        "sessions": session_store.stats(),
+        "agent": agent.stats(),
+        "feedback": feedback_writer.stats(),
+        "hotel_providers": hotel_search.stats(),
+        "circuit_breakers": breaker_stats(),
+        "admission": admission.stats(),
+        "webhook_dedupe": {channel: dedupe.stats() for channel, dedupe in webhook_dedupe.items()},
+        "startup": startup_timer.report()
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Prometheus metrics: request counts, in-flight gauges, stage and outbound latencies"""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to the Tourism Chatbot API! Visit /health for status."}
 
-# Conditionally include routers
-if settings.telegram_token:
-    from src.routers.telegram import create_telegram_router
-    app.include_router(create_telegram_router(agent))
-    logger.info("Telegram bot enabled")
-
-if settings.twilio_account_sid and settings.twilio_auth_token:
-    from src.routers.whatsapp import create_whatsapp_router
-    app.include_router(create_whatsapp_router(agent))
-    logger.info("WhatsApp integration enabled")
+async def reload_agent():
+    # Cached completions are keyed by model revision, so the previous model's
+    # entries simply age out of the shared cache
+    if await agent.reload(build_agent):
+        logger.info("Model reloaded after repo update")
 
 WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "MY_SUPER_SECRET")  # Use env or default
 
 @app.post("/webhook")
-async def handle_huggingface_webhook(request: Request):
+async def handle_huggingface_webhook(request: Request, background_tasks: BackgroundTasks):
     try:
         secret = request.headers.get("X-Webhook-Secret")
         if secret != WEBHOOK_SECRET:
@@ -138,14 +447,9 @@ async def handle_huggingface_webhook(request: Request):
         if payload.get("event") == "repo_update":
             repo = payload.get("repo", {})
             logger.info(f"Repository updated: {repo.get('name')} at {repo.get('updated_at')}")
-            # Optional: Reload the model from Hugging Face Hub
-            global client, agent
-            try:
-                client = InferenceClient("ArsenKe/MT5_large_finetuned_chatbot", token=settings.huggingface_api_key)
-                agent = TourismAgent(llm_client=client, hotel_api=None)
-                logger.info("Model reloaded after repo update")
-            except Exception as e:
-                logger.error(f"Error reloading model: {str(e)}")
+            # Reload the model from Hugging Face Hub after acking the webhook; the
+            # current agent keeps serving until the new one is warmed up
+            background_tasks.add_task(reload_agent)
 
         return {"status": "received"}
     except Exception as e:
@@ -154,4 +458,4 @@ async def handle_huggingface_webhook(request: Request):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=7860)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=7860, proxy_headers=True)
\ No newline at end of file
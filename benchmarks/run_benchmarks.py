@@ -0,0 +1,301 @@
+"""Micro-benchmarks for the TourismAgent hot path
+
+Runs with stub LLM and HTTP backends, so results only reflect our own code:
+
+    python benchmarks/run_benchmarks.py                     # run and compare
+    python benchmarks/run_benchmarks.py --save-baseline     # record a new baseline
+    python benchmarks/run_benchmarks.py --output out.json   # machine-readable results
+
+Results are compared against benchmarks/baseline.json; a benchmark whose
+median time per call grows by more than --threshold (default 25%) is a
+regression and the script exits with status 1. A missing baseline file is
+an error (status 2) unless --no-compare is given; benchmarks without a
+baseline entry are listed as uncompared. Benchmarks whose optional
+dependencies are not installed are reported as skipped; a benchmark that
+raises is reported as failed, the rest still run, and the script exits
+with status 1 (no baseline is written then).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+MESSAGES = [
+    "Hotels in Paris",
+    "Things to do in Rome",
+    "Find a beach resort in Bali",
+    "Book a hotel in New York for tomorrow",
+    "I'd like to stay somewhere near the old town in Prague next week",
+    "What is the best time of year to visit Vienna?",
+    "Can you recommend a restaurant for dinner in Barcelona?",
+    "Tell me something interesting about the history of Lisbon",
+]
+
+
+class StubLLM:
+    """Returns a fixed completion without any inference"""
+
+    def text_generation(self, prompt: str, **kwargs) -> str:
+        return "Here are some great options for your trip!"
+
+
+class StubResponse:
+    status_code = 200
+
+    def __init__(self, payload):
+        self._payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._payload
+
+
+class StubSession:
+    """Stands in for the pooled requests.Session; serves a canned payload"""
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def get(self, url, params=None, timeout=None):
+        return StubResponse(self.payload)
+
+
+def makcorps_payload(size: int) -> List[dict]:
+    """Synthetic MakCorps city search payload with ``size`` hotels"""
+    return [
+        {
+            "id": f"hotel_{i}",
+            "name": f"Hotel Number {i}",
+            "reviews": {"rating": round(3 + (i % 20) / 10, 1), "count": 100 + i},
+            "price": 80 + i % 300,
+            "currency": "EUR",
+            "url": f"https://example.com/hotels/{i}",
+            "price1": 80 + i % 300,
+            "price2": 90 + i % 300,
+        }
+        for i in range(size)
+    ]
+
+
+def measure(fn: Callable[[], object], repeats: int, min_time: float) -> Dict[str, float]:
+    """Median/min microseconds per call over ``repeats`` timed rounds"""
+    fn()  # warm-up
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - start >= min_time:
+            break
+        number *= 2
+
+    per_call = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        per_call.append((time.perf_counter() - start) / number * 1e6)
+    return {
+        "median_us": round(statistics.median(per_call), 3),
+        "min_us": round(min(per_call), 3),
+        "stdev_us": round(statistics.stdev(per_call), 3) if len(per_call) > 1 else 0.0,
+        "calls_per_round": number
+    }
+
+
+def agent_benchmarks() -> Dict[str, Callable[[], object]]:
+    from src.agents.tourism_agent import TourismAgent
+
+    agent = TourismAgent(llm_client=StubLLM(), hotel_api=None)
+    hotels = agent.search_hotels("Vienna", "2025-01-01") * 10
+
+    def classify():
+        for message in MESSAGES:
+            agent.classify_intent(message)
+
+    def extract():
+        for message in MESSAGES:
+            agent.extract_parameters(message)
+
+    return {
+        "agent.classify_intent[8 msgs]": classify,
+        "agent.extract_parameters[8 msgs]": extract,
+        "agent.generate_response[20 hotels]": lambda: agent.generate_response(hotels),
+        "agent.process_message[hotel]": lambda: agent.process_message("Hotels in Paris"),
+        "agent.process_message[general]": lambda: agent.process_message("Things to do in Rome"),
+    }
+
+
+def api_client_benchmarks() -> Dict[str, Callable[[], object]]:
+    from src.tools import http_pool
+    from src.tools.api_client import BookingAPIClient
+    from src.tools.hotel_cache import HotelSearchCache
+
+    payload = makcorps_payload(500)
+    client = BookingAPIClient(cache=HotelSearchCache(ttl=0, stale_ttl=0))
+    client.use_simulation = False
+    client.api_key = "stub"
+    http_pool.mount_session(client.base_url, StubSession(payload))
+
+    return {
+        "api_client._format_response[500 hotels]":
+            lambda: client._format_response(payload, "Paris", "2025-01-01", "2025-01-02"),
+        "api_client.search_hotels[stub http, 500 hotels]":
+            lambda: client.search_hotels("Paris", "2025-01-01"),
+    }
+
+
+def serialization_benchmarks() -> Dict[str, Callable[[], object]]:
+    from src.models.chat_models import ChatResponse, BatchItemResult
+
+    text = "Here are some great options for your trip! " * 10
+    hotels = [{"name": f"Hotel {i}", "price": 100 + i, "rating": 4.5, "url": "https://example.com"} for i in range(20)]
+
+    return {
+        "ChatResponse.model_dump_json": lambda: ChatResponse(response=text, session_id="bench").model_dump_json(),
+        "BatchItemResult.model_dump_json[20 hotels]": lambda: BatchItemResult(
+            index=0, session_id="bench", status="success", response=text, hotels=hotels
+        ).model_dump_json(),
+    }
+
+
+def hotel_record_benchmarks() -> Dict[str, Callable[[], object]]:
+    import orjson
+    from src.agents.tourism_agent import TourismAgent
+    from src.models.hotel_record import hotels_to_public
+
+    hotels = TourismAgent(llm_client=StubLLM(), hotel_api=None).search_hotels("Vienna", "2025-01-01") * 10
+
+    return {
+        "orjson.dumps[20 hotels]": lambda: orjson.dumps({"hotels": hotels_to_public(hotels)}),
+        "hotels_to_public[20 hotels]": lambda: hotels_to_public(hotels),
+    }
+
+
+GROUPS = [agent_benchmarks, api_client_benchmarks, serialization_benchmarks, hotel_record_benchmarks]
+
+
+def run(repeats: int, min_time: float, selected: Optional[str]) -> Dict[str, dict]:
+    results: Dict[str, dict] = {}
+    for group in GROUPS:
+        try:
+            benchmarks = group()
+        except ImportError as e:
+            results[group.__name__] = {"skipped": f"missing dependency: {e.name}"}
+            continue
+        except Exception as e:
+            results[group.__name__] = {"error": f"{type(e).__name__}: {e}"}
+            continue
+        for name, fn in benchmarks.items():
+            if selected and selected not in name:
+                continue
+            try:
+                results[name] = measure(fn, repeats, min_time)
+            except Exception as e:
+                results[name] = {"error": f"{type(e).__name__}: {e}"}
+    return results
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if "median_us" not in result or not base or "median_us" not in base:
+            continue
+        change = result["median_us"] / base["median_us"] - 1
+        result["baseline_us"] = base["median_us"]
+        result["change"] = round(change, 4)
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Write results as the new baseline")
+    parser.add_argument("--no-compare", action="store_true", help="Only report timings, without a baseline")
+    parser.add_argument("--output", default=None, help="Write results as JSON")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--repeats", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.05, help="Minimum seconds per timed round")
+    parser.add_argument("-k", dest="selected", default=None, help="Only run benchmarks containing this string")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.WARNING)
+
+    compare_baseline = not args.save_baseline and not args.no_compare
+    if compare_baseline and not os.path.exists(args.baseline):
+        print(
+            f"ERROR: baseline {args.baseline} not found; record one with --save-baseline "
+            f"or pass --no-compare to only report timings",
+            file=sys.stderr
+        )
+        sys.exit(2)
+
+    results = run(args.repeats, args.min_time, args.selected)
+    regressions: List[str] = []
+    if compare_baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f)["results"], args.threshold)
+
+    print(f"{'Benchmark':<48} {'median us':>12} {'baseline':>12} {'change':>9}")
+    print("-" * 84)
+    for name, result in results.items():
+        if "skipped" in result:
+            print(f"{name:<48} skipped ({result['skipped']})")
+            continue
+        if "error" in result:
+            print(f"{name:<48} FAILED ({result['error']})")
+            continue
+        baseline = result.get("baseline_us", "")
+        change = f"{result['change']:+.1%}" if "change" in result else ""
+        flag = "  REGRESSION" if name in regressions else ""
+        print(f"{name:<48} {result['median_us']:>12} {baseline:>12} {change:>9}{flag}")
+
+    uncompared = [
+        name for name, result in results.items()
+        if compare_baseline and "median_us" in result and "change" not in result
+    ]
+    if uncompared:
+        print(f"\nWARNING: no baseline entry for {', '.join(uncompared)}; rerun --save-baseline to cover them")
+
+    failed = [name for name, result in results.items() if "error" in result]
+    if failed:
+        print(f"\nERROR: {', '.join(failed)} failed", file=sys.stderr)
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+        "regressions": regressions,
+        "failed": failed
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        if failed:
+            print("Baseline not written while benchmarks fail", file=sys.stderr)
+        else:
+            with open(args.baseline, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"\nBaseline written to {args.baseline}")
+
+    sys.exit(1 if regressions or failed else 0)
+
+
+if __name__ == "__main__":
+    main()
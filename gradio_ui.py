@@ -5,14 +5,16 @@ import os
 # Get API URL from environment or use your Render deployment
 API_URL = os.getenv("API_URL", "https://llmchatbot-gd33.onrender.com")
 
-def chat_with_bot(message, history):
+def chat_with_bot(message, history, request: gr.Request):
     """Send user message to FastAPI backend and return response"""
+    # One conversation (and rate-limit bucket) per browser session
+    session_id = f"gradio-{request.session_hash}" if request and request.session_hash else "default"
     try:
         response = requests.post(
             f"{API_URL}/chat",
             json={
                 "message": message,
-                "session_id": "gradio",
+                "session_id": session_id,
                 "platform": "web"
             }
         ).json()
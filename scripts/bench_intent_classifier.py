@@ -0,0 +1,99 @@
+"""Benchmark intent classification cost as the keyword table grows
+
+Compares the compiled IntentClassifier against the naive per-keyword
+substring scan it replaced, for tables from a handful to thousands of
+keywords. Per-message cost of the compiled matcher should stay flat.
+
+    python scripts/bench_intent_classifier.py --sizes 10 100 1000 5000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agents.intent_classifier import DEFAULT_INTENTS, IntentClassifier
+
+MESSAGES = [
+    "Hotels in Paris",
+    "Things to do in Rome",
+    "Find a beach resort in Bali",
+    "What is the weather like in Vienna next week?",
+    "Can you recommend a good restaurant near the Colosseum for dinner tomorrow?",
+    "How do I get from the airport to the city centre by train?",
+    "I'd like to book a room in Barcelona for two nights starting on Friday",
+    "Tell me something interesting about the history of Prague",
+]
+
+
+def build_table(size: int, seed: int = 0) -> dict:
+    """DEFAULT_INTENTS padded with synthetic keywords up to ``size`` entries"""
+    rng = random.Random(seed)
+    table = {intent: list(keywords) for intent, keywords in DEFAULT_INTENTS.items()}
+    intents = list(table)
+    total = sum(len(k) for k in table.values())
+    while total < size:
+        words = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 9)))
+                 for _ in range(rng.randint(1, 3))]
+        table[rng.choice(intents)].append(" ".join(words))
+        total += 1
+    return table
+
+
+def naive_classify_all(table: dict, message: str) -> list:
+    message = message.lower()
+    return [intent for intent, keywords in table.items() if any(kw in message for kw in keywords)]
+
+
+def time_per_message(fn, messages, min_seconds: float = 0.2) -> float:
+    """Mean microseconds per message over enough rounds to run min_seconds"""
+    rounds, elapsed = 0, 0.0
+    start = time.perf_counter()
+    while elapsed < min_seconds:
+        for message in messages:
+            fn(message)
+        rounds += 1
+        elapsed = time.perf_counter() - start
+    return elapsed / (rounds * len(messages)) * 1e6
+
+
+def run(sizes) -> list:
+    results = []
+    for size in sizes:
+        table = build_table(size)
+        keywords = sum(len(k) for k in table.values())
+        classifier = IntentClassifier(table)
+        compiled = time_per_message(classifier.classify_all, MESSAGES)
+        batch = time_per_message(lambda m: classifier.classify_batch([m] * 64), MESSAGES) / 64
+        naive = time_per_message(lambda m: naive_classify_all(table, m), MESSAGES)
+        results.append({
+            "keywords": keywords,
+            "compiled_us": round(compiled, 2),
+            "batch_us": round(batch, 2),
+            "naive_us": round(naive, 2)
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.sizes)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'Keywords':>10} {'Compiled us/msg':>16} {'Batch us/msg':>14} {'Naive us/msg':>14}")
+    print("-" * 58)
+    for r in results:
+        print(f"{r['keywords']:>10} {r['compiled_us']:>16} {r['batch_us']:>14} {r['naive_us']:>14}")
+
+
+if __name__ == "__main__":
+    main()
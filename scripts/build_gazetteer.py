@@ -0,0 +1,25 @@
+"""Build the memory-mapped gazetteer index from a name,aliases,city_id CSV
+
+    python scripts/build_gazetteer.py data/gazetteer.csv data/gazetteer.idx
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.tools.gazetteer import DEFAULT_CSV, DEFAULT_INDEX, Gazetteer, build_index, read_csv
+
+
+def build(csv_path: str, index_path: str):
+    rows = read_csv(csv_path)
+    data = build_index(rows)
+    with open(index_path, "wb") as f:
+        f.write(data)
+    gazetteer = Gazetteer.open(index_path)
+    print(f"Wrote {index_path}: {len(rows)} cities, {gazetteer.count} names, {len(data)} bytes")
+
+
+if __name__ == "__main__":
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CSV
+    index_path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_INDEX
+    build(csv_path, index_path)
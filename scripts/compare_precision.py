@@ -0,0 +1,129 @@
+"""Compare fp32 and int8 inference for the MT5 chatbot on a fixed prompt set
+
+Each precision runs in its own subprocess so resident memory is measured
+cleanly. Reports load time, RSS, per-prompt latency and how closely the
+int8 answers match the fp32 ones.
+
+    python scripts/compare_precision.py --quantized-path models/mt5-int8.pt
+"""
+import argparse
+import difflib
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PROMPTS = [
+    "You are a helpful travel assistant. Answer this question in a friendly, informative way:\n\nThings to do in Rome",
+    "You are a helpful travel assistant. Answer this question in a friendly, informative way:\n\nWhat is the best time to visit Vienna?",
+    "You are a helpful travel assistant. Answer this question in a friendly, informative way:\n\nHow do I get from the airport to central Paris?",
+    "You are a helpful travel assistant. Summarize these hotel options in a friendly, concise way:\n\n"
+    "- Grand Vienna Hotel ($150/night, Rating: 4.5/5)\n- Vienna Riverside Inn ($120/night, Rating: 4.2/5)",
+    "You are a helpful travel assistant. Summarize these hotel options in a friendly, concise way:\n\n"
+    "- Luxury Hotel in Bali (250, Rating: 4.8/5)\n- Boutique Hotel in Bali (180, Rating: 4.5/5)",
+]
+
+
+def rss_mb() -> float:
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def run_single(model_name: str, precision: str, quantized_path: str, max_new_tokens: int, repeats: int) -> dict:
+    import torch
+    from transformers import AutoTokenizer
+    from src.models.quantization import load_seq2seq_model
+
+    torch.manual_seed(0)
+    start = time.perf_counter()
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = load_seq2seq_model(model_name, precision, quantized_path if precision == "int8" else None)
+    load_seconds = time.perf_counter() - start
+
+    outputs, latencies = [], []
+    for prompt in PROMPTS:
+        inputs = tokenizer(prompt, return_tensors="pt", truncation=True, max_length=512)
+        timings = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            with torch.inference_mode():
+                generated = model.generate(**inputs, max_new_tokens=max_new_tokens, do_sample=False)
+            timings.append(time.perf_counter() - t0)
+        outputs.append(tokenizer.decode(generated[0], skip_special_tokens=True))
+        latencies.append(statistics.median(timings))
+
+    return {
+        "precision": precision,
+        "load_seconds": round(load_seconds, 2),
+        "rss_mb": round(rss_mb(), 1),
+        "latencies": [round(x, 3) for x in latencies],
+        "outputs": outputs
+    }
+
+
+def run_in_subprocess(args, precision: str) -> dict:
+    cmd = [
+        sys.executable, os.path.abspath(__file__),
+        "--single", precision,
+        "--model", args.model,
+        "--max-new-tokens", str(args.max_new_tokens),
+        "--repeats", str(args.repeats)
+    ]
+    if args.quantized_path:
+        cmd += ["--quantized-path", args.quantized_path]
+    result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def compare(args) -> dict:
+    fp32 = run_in_subprocess(args, "fp32")
+    int8 = run_in_subprocess(args, "int8")
+    similarity = [
+        difflib.SequenceMatcher(None, a, b).ratio()
+        for a, b in zip(fp32["outputs"], int8["outputs"])
+    ]
+
+    print(f"{'':<18} {'fp32':>10} {'int8':>10}")
+    print("-" * 40)
+    print(f"{'Load time (s)':<18} {fp32['load_seconds']:>10} {int8['load_seconds']:>10}")
+    print(f"{'Peak RSS (MB)':<18} {fp32['rss_mb']:>10} {int8['rss_mb']:>10}")
+    print(f"{'Median latency (s)':<18} {statistics.median(fp32['latencies']):>10.3f} "
+          f"{statistics.median(int8['latencies']):>10.3f}")
+    print(f"\nOutput similarity vs fp32: mean {statistics.mean(similarity):.3f}, min {min(similarity):.3f}")
+    for i, (prompt, score) in enumerate(zip(PROMPTS, similarity)):
+        print(f"\n[{i}] similarity {score:.3f} | {prompt.splitlines()[-1][:60]}")
+        print(f"  fp32: {fp32['outputs'][i]}")
+        print(f"  int8: {int8['outputs'][i]}")
+
+    return {"fp32": fp32, "int8": int8, "similarity": similarity}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="ArsenKe/MT5_large_finetuned_chatbot")
+    parser.add_argument("--quantized-path", default=None, help="Save/reload the int8 state dict here")
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", default=None, help="Write the full comparison as JSON")
+    parser.add_argument("--single", choices=["fp32", "int8"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(run_single(args.model, args.single, args.quantized_path, args.max_new_tokens, args.repeats)))
+        return
+
+    report = compare(args)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
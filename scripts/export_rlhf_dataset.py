@@ -0,0 +1,81 @@
+"""Export stored feedback as RLHF training data (preference pairs + SFT examples)
+
+    python scripts/export_rlhf_dataset.py --backend jsonl --path data/feedback.jsonl --output exports/rlhf
+    python scripts/export_rlhf_dataset.py --backend firebase --output exports/rlhf --format parquet
+
+Rerunning with the same --output resumes from its checkpoint.json; pass
+--restart to discard it and export from scratch.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.feedback.export import ExportConfig, RLHFExporter
+from src.feedback.local_store import create_backend
+
+
+def timestamp(value: str) -> float:
+    """ISO date/datetime or unix seconds"""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", default="auto", choices=["auto", "firebase", "jsonl", "sqlite"])
+    parser.add_argument("--path", default=None, help="JSONL/SQLite feedback file")
+    parser.add_argument("--output", required=True, help="Output directory (also holds the checkpoint)")
+    parser.add_argument("--format", default="jsonl", choices=["jsonl", "parquet"])
+    parser.add_argument("--shard-size", type=int, default=10_000, help="Rows per output shard")
+    parser.add_argument("--partitions", type=int, default=64, help="Spill partitions")
+    parser.add_argument(
+        "--max-partition-records", type=int, default=200_000,
+        help="Larger partitions are re-split before pairing; bounds peak memory"
+    )
+    parser.add_argument("--eval-fraction", type=float, default=0.05)
+    parser.add_argument("--max-pairs-per-prompt", type=int, default=4)
+    parser.add_argument("--max-sft-per-prompt", type=int, default=2)
+    parser.add_argument("--min-response-chars", type=int, default=1)
+    parser.add_argument("--since", type=timestamp, default=None)
+    parser.add_argument("--until", type=timestamp, default=None)
+    parser.add_argument("--channel", action="append", dest="channels", help="Only these channels (repeatable)")
+    parser.add_argument("--restart", action="store_true", help="Delete a previous export's files and start over")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    config = ExportConfig(
+        output_dir=args.output,
+        format=args.format,
+        partitions=args.partitions,
+        max_partition_records=args.max_partition_records,
+        shard_size=args.shard_size,
+        eval_fraction=args.eval_fraction,
+        max_pairs_per_prompt=args.max_pairs_per_prompt,
+        max_sft_per_prompt=args.max_sft_per_prompt,
+        min_response_chars=args.min_response_chars,
+        since=args.since,
+        until=args.until,
+        channels=args.channels
+    )
+    backend = create_backend(args.backend, args.path)
+    exporter = RLHFExporter(backend, config)
+    if args.restart:
+        # Only the checkpoint, spill files, manifest and shards; --output may be shared
+        exporter.reset()
+    try:
+        manifest = exporter.run()
+    finally:
+        backend.close()
+    print(json.dumps({"records": manifest["records"], "counts": manifest["counts"]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Short, representative prompts that exercise the backend end to end
+WARMUP_MESSAGES = [
+    "Hello!",
+    "What are the top things to do in Vienna?",
+]
+
+
+class _Generation:
+    """One agent instance plus the count of requests currently using it"""
+    __slots__ = ("number", "agent", "in_flight", "lock")
+
+    def __init__(self, number: int, agent):
+        self.number = number
+        self.agent = agent
+        self.in_flight = 0
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self.lock:
+            self.in_flight += 1
+
+    def release(self) -> None:
+        with self.lock:
+            self.in_flight -= 1
+
+
+class AgentHolder:
+    """Double-buffered TourismAgent shared by every entry point
+
+    Routers and endpoints call the holder exactly like an agent. Each call
+    pins the generation that was current when it started, so a reload never
+    switches backends mid-request. ``reload`` builds the replacement off the
+    event loop, warms it up, swaps it in with a single reference assignment
+    and only then drains and closes the previous generation. A failed build
+    or warm-up leaves the current agent serving.
+    """
+
+    def __init__(self, agent, drain_timeout: float = 30.0, warmup_messages: Optional[List[str]] = None):
+        self._current = _Generation(0, agent)
+        self._retired: List[_Generation] = []
+        self._reload_lock: Optional[asyncio.Lock] = None
+        self.drain_timeout = drain_timeout
+        self.warmup_messages = WARMUP_MESSAGES if warmup_messages is None else warmup_messages
+        self.reloads = 0
+        self.failed_reloads = 0
+        self.last_reload_seconds: Optional[float] = None
+
+    @property
+    def agent(self):
+        return self._current.agent
+
+    @property
+    def generation(self) -> int:
+        return self._current.number
+
+    def process_message(self, message: str, session_id: Optional[str] = None, channel: str = "web") -> dict:
+        generation = self._current
+        generation.acquire()
+        try:
+            return generation.agent.process_message(message, session_id=session_id, channel=channel)
+        finally:
+            generation.release()
+
+    async def aprocess_message(self, message: str, session_id: Optional[str] = None, channel: str = "web") -> dict:
+        generation = self._current
+        generation.acquire()
+        try:
+            return await generation.agent.aprocess_message(message, session_id=session_id, channel=channel)
+        finally:
+            generation.release()
+
+    async def astream_message(
+        self,
+        message: str,
+        session_id: Optional[str] = None,
+        channel: str = "web"
+    ) -> AsyncIterator[Dict[str, Any]]:
+        generation = self._current
+        generation.acquire()
+        try:
+            async for event in generation.agent.astream_message(message, session_id=session_id, channel=channel):
+                yield event
+        finally:
+            generation.release()
+
+    async def reload(self, factory: Callable[[int], Any]) -> bool:
+        """Build, warm up and swap in ``factory(generation)``; returns False on failure
+
+        Reloads are serialized, so overlapping webhooks cannot race each other.
+        """
+        if self._reload_lock is None:
+            self._reload_lock = asyncio.Lock()
+        async with self._reload_lock:
+            number = self._current.number + 1
+            start = time.perf_counter()
+            try:
+                # Client construction may download or load a model: keep it off the loop
+                agent = await asyncio.to_thread(factory, number)
+                await agent.warm_up(self.warmup_messages)
+            except Exception as e:
+                self.failed_reloads += 1
+                logger.error(f"Agent reload {number} failed, keeping generation {self._current.number}: {str(e)}")
+                return False
+
+            previous, self._current = self._current, _Generation(number, agent)
+            self.reloads += 1
+            self.last_reload_seconds = round(time.perf_counter() - start, 3)
+            logger.info(f"Agent generation {number} live after {self.last_reload_seconds}s; draining {previous.number}")
+
+        await self._retire(previous)
+        return True
+
+    async def _retire(self, generation: _Generation) -> None:
+        """Wait for requests pinned to ``generation`` to finish, then close it"""
+        self._retired.append(generation)
+        deadline = time.monotonic() + self.drain_timeout
+        while generation.in_flight > 0 and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        if generation.in_flight > 0:
+            logger.warning(
+                f"Generation {generation.number} still has {generation.in_flight} requests "
+                f"after {self.drain_timeout}s; closing anyway"
+            )
+        await generation.agent.aclose()
+        self._retired.remove(generation)
+        logger.info(f"Agent generation {generation.number} drained and closed")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "generation": self._current.number,
+            "in_flight": self._current.in_flight,
+            "draining": {g.number: g.in_flight for g in self._retired},
+            "reloading": self._reload_lock is not None and self._reload_lock.locked(),
+            "reloads": self.reloads,
+            "failed_reloads": self.failed_reloads,
+            "last_reload_seconds": self.last_reload_seconds
+        }
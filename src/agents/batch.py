@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import re
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Iterable, Optional, Tuple
+
+from src.routers.admission import generation_slot
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+# (message, session_id) as passed to TourismAgent.aprocess_message
+BatchItem = Tuple[str, Optional[str]]
+
+
+class BatchProcessor:
+    """Run many chat messages through a TourismAgent with bounded parallelism
+
+    Results are yielded in input order while up to ``parallelism`` messages
+    are processed concurrently. Only a sliding window of ``2 * parallelism``
+    items is kept in flight, so memory does not grow with batch size.
+    Stateless items with the same normalized message inside the window share
+    one agent call; hotel lookups and completions are further shared through
+    the hotel search and completion caches.
+
+    With an ``admission`` controller every agent call also takes a slot of
+    the global generation cap; an item refused under load fails on its own.
+    """
+
+    def __init__(self, agent, parallelism: int = 8, admission=None):
+        self.agent = agent
+        self.parallelism = max(1, parallelism)
+        self.admission = admission
+
+    async def run(self, items: Iterable[BatchItem]) -> AsyncIterator[Dict[str, Any]]:
+        semaphore = asyncio.Semaphore(self.parallelism)
+        shared: Dict[str, Tuple[asyncio.Task, int]] = {}
+        window: Deque[Tuple[int, Optional[str], asyncio.Task]] = deque()
+
+        async def process(message: str, session_id: Optional[str]) -> Dict[str, Any]:
+            async with semaphore, generation_slot(self.admission, "batch"):
+                return await self.agent.aprocess_message(message, session_id=session_id, channel="batch")
+
+        def start(message: str, session_id: Optional[str]) -> Tuple[Optional[str], asyncio.Task]:
+            if session_id is not None:
+                # Session turns depend on history, never share them
+                return None, asyncio.ensure_future(process(message, session_id))
+            key = _WHITESPACE.sub(" ", message).strip().casefold()
+            task, refs = shared.get(key, (None, 0))
+            if task is None:
+                task = asyncio.ensure_future(process(message, None))
+            shared[key] = (task, refs + 1)
+            return key, task
+
+        async def finish(index: int, key: Optional[str], task: asyncio.Task) -> Dict[str, Any]:
+            try:
+                result = await task
+                outcome = {
+                    "index": index,
+                    "status": "success",
+                    "response": result["response"],
+                    "hotels": result.get("hotels", [])
+                }
+            except Exception as e:
+                logger.error(f"Batch item {index} failed: {str(e)}")
+                outcome = {"index": index, "status": "error", "error": "Processing error"}
+            if key is not None:
+                shared_task, refs = shared[key]
+                if refs <= 1:
+                    del shared[key]
+                else:
+                    shared[key] = (shared_task, refs - 1)
+            return outcome
+
+        try:
+            for index, (message, session_id) in enumerate(items):
+                key, task = start(message, session_id)
+                window.append((index, key, task))
+                if len(window) >= 2 * self.parallelism:
+                    yield await finish(*window.popleft())
+            while window:
+                yield await finish(*window.popleft())
+        finally:
+            # Client went away mid-stream: stop the remaining work
+            for _, _, task in window:
+                task.cancel()
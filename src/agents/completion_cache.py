@@ -0,0 +1,170 @@
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class _Call:
+    """A synchronous in-flight generation shared by concurrent callers"""
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Optional[str] = None
+        self.error: Optional[BaseException] = None
+
+
+class CompletionCache:
+    """Bounded LRU + TTL cache for LLM completions with request coalescing
+
+    Entries are keyed on the normalized prompt plus the generation parameters.
+    Concurrent misses for the same key share a single in-flight generation
+    (singleflight), so a burst of identical questions costs one LLM call.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 600.0, max_bytes: int = 16 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[float, str, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, _Call] = {}
+        self._ainflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(prompt: str, params: Dict[str, Any]) -> str:
+        """Build a cache key from the normalized prompt and generation params"""
+        normalized = _WHITESPACE.sub(" ", prompt).strip().casefold()
+        raw = normalized + "\x00" + json.dumps(params, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value, size = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        size = sys.getsizeof(key) + sys.getsizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def get_or_generate(self, prompt: str, params: Dict[str, Any], generate: Callable[[], str]) -> str:
+        """Return a cached completion or run ``generate`` once for all concurrent callers"""
+        key = self.make_key(prompt, params)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._inflight[key] = call
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = generate()
+            self.set(key, call.result)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.event.set()
+
+    async def aget_or_generate(
+        self,
+        prompt: str,
+        params: Dict[str, Any],
+        generate: Callable[[], Awaitable[str]]
+    ) -> str:
+        """Async variant of get_or_generate; callers share one generation task"""
+        key = self.make_key(prompt, params)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        task = self._ainflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run(key, generate))
+            self._ainflight[key] = task
+        else:
+            self.coalesced += 1
+        # Shield so one cancelled caller does not abort the shared generation
+        return await asyncio.shield(task)
+
+    async def _run(self, key: str, generate: Callable[[], Awaitable[str]]) -> str:
+        try:
+            result = await generate()
+            self.set(key, result)
+            return result
+        finally:
+            self._ainflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
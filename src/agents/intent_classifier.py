@@ -0,0 +1,98 @@
+import re
+from typing import Dict, Iterable, List, Optional
+
+# Intents are listed in priority order: the first match is the primary intent
+DEFAULT_INTENTS: Dict[str, List[str]] = {
+    "hotel_search": [
+        "hotel", "hotels", "stay", "staying", "accommodation", "accommodations",
+        "book", "booking", "reservation", "reservations", "reserve", "hostel",
+        "hostels", "resort", "resorts", "room", "rooms", "place to stay", "where to stay"
+    ],
+    "attractions": [
+        "things to do", "attraction", "attractions", "sightseeing", "sights",
+        "museum", "museums", "landmark", "landmarks", "tour", "tours", "what to see"
+    ],
+    "restaurants": [
+        "restaurant", "restaurants", "food", "eat", "eating", "dinner", "lunch",
+        "breakfast", "cafe", "cafes"
+    ],
+    "transport": [
+        "flight", "flights", "train", "trains", "bus", "airport", "taxi",
+        "transfer", "get from", "get to", "public transport"
+    ],
+    "weather": ["weather", "forecast", "temperature", "rain", "sunny"]
+}
+
+DEFAULT_INTENT = "general_question"
+
+_TOKEN = re.compile(r"\w+")
+_END = ""  # Trie key marking the intents of a complete phrase
+
+
+class IntentClassifier:
+    """Keyword intent classifier compiled into a single word-level trie
+
+    Keywords may be single words or multi-word phrases and only match on
+    whole words ("book" does not match "booklet"). A message is tokenized
+    once and the trie is walked from every token, so the cost per message
+    depends on its length and the longest phrase, not on the table size.
+    """
+
+    def __init__(self, intents: Optional[Dict[str, Iterable[str]]] = None, default: str = DEFAULT_INTENT):
+        self.default = default
+        self.intents = dict(intents if intents is not None else DEFAULT_INTENTS)
+        self._priority = {intent: i for i, intent in enumerate(self.intents)}
+        self._trie: Dict[str, dict] = {}
+        self._max_phrase = 1
+        for intent, keywords in self.intents.items():
+            for keyword in keywords:
+                self._add(keyword, intent)
+
+    def _add(self, keyword: str, intent: str) -> None:
+        tokens = _TOKEN.findall(keyword.lower())
+        if not tokens:
+            return
+        node = self._trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node.setdefault(_END, set()).add(intent)
+        self._max_phrase = max(self._max_phrase, len(tokens))
+
+    def _match(self, message: str) -> set:
+        tokens = _TOKEN.findall(message.lower())
+        trie = self._trie
+        found = set()
+        for start in range(len(tokens)):
+            node = trie
+            for token in tokens[start:start + self._max_phrase]:
+                node = node.get(token)
+                if node is None:
+                    break
+                intents = node.get(_END)
+                if intents:
+                    found |= intents
+        return found
+
+    def classify_all(self, message: str) -> List[str]:
+        """Every intent found in the message, in priority order"""
+        found = self._match(message)
+        if not found:
+            return [self.default]
+        return sorted(found, key=self._priority.__getitem__)
+
+    def classify(self, message: str) -> str:
+        """The highest-priority intent in the message"""
+        return self.classify_all(message)[0]
+
+    def classify_batch(self, messages: Iterable[str]) -> List[List[str]]:
+        """classify_all for many messages at once"""
+        match = self._match
+        priority = self._priority.__getitem__
+        results = []
+        for message in messages:
+            found = match(message)
+            results.append(sorted(found, key=priority) if found else [self.default])
+        return results
+
+
+default_classifier = IntentClassifier()
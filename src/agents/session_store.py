@@ -0,0 +1,145 @@
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Tuple
+
+# (user message, assistant reply)
+Turn = Tuple[str, str]
+
+# Amortized OrderedDict slot and link node per session, plus the last_seen float
+_ENTRY_OVERHEAD = 160
+
+
+class _Session:
+    __slots__ = ("turns", "last_seen", "size")
+
+    def __init__(self, session_id: str, max_turns: int):
+        self.turns: Deque[Turn] = deque(maxlen=max_turns)
+        self.last_seen = time.monotonic()
+        # Fixed cost of an empty session; the deque part is re-measured as it grows
+        self.size = sys.getsizeof(self) + sys.getsizeof(self.turns) + sys.getsizeof(session_id) + _ENTRY_OVERHEAD
+
+
+def _turn_size(turn: Turn) -> int:
+    return sys.getsizeof(turn) + sys.getsizeof(turn[0]) + sys.getsizeof(turn[1])
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) for prompt budgeting"""
+    return len(text) // 4 + 1
+
+
+class SessionStore:
+    """Bounded per-session conversation memory
+
+    Each session keeps a ring buffer of its last ``max_turns`` turns, with
+    every message clipped to ``max_turn_chars``. Sessions are kept in LRU
+    order; idle sessions expire after ``idle_ttl`` seconds and the least
+    recently used ones are evicted whenever ``max_sessions`` or ``max_bytes``
+    would be exceeded, so memory stays flat regardless of traffic.
+    ``max_bytes`` covers each session's own bookkeeping as well as its text.
+    With ``max_turns`` of 0 no history is kept.
+    """
+
+    def __init__(
+        self,
+        max_turns: int = 6,
+        max_sessions: int = 100_000,
+        max_bytes: int = 64 * 1024 * 1024,
+        idle_ttl: float = 1800.0,
+        max_turn_chars: int = 1000
+    ):
+        self.max_turns = max_turns
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self.max_turn_chars = max_turn_chars
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def append(self, session_id: str, user_message: str, reply: str) -> None:
+        if self.max_turns <= 0:
+            return
+        turn = (user_message[:self.max_turn_chars], reply[:self.max_turn_chars])
+        size = _turn_size(turn)
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = _Session(session_id, self.max_turns)
+                self._sessions[session_id] = session
+                self._bytes += session.size
+            else:
+                self._sessions.move_to_end(session_id)
+            if len(session.turns) == session.turns.maxlen:
+                size -= _turn_size(session.turns[0])
+            deque_size = sys.getsizeof(session.turns)
+            session.turns.append(turn)
+            size += sys.getsizeof(session.turns) - deque_size
+            session.size += size
+            session.last_seen = now
+            self._bytes += size
+            while self._sessions and (len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes):
+                self._evict_oldest()
+
+    def history(self, session_id: str) -> List[Turn]:
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return []
+            if now - session.last_seen > self.idle_ttl:
+                self._drop(session_id)
+                return []
+            session.last_seen = now
+            self._sessions.move_to_end(session_id)
+            return list(session.turns)
+
+    def build_history(self, session_id: str, token_budget: int) -> str:
+        """Format the most recent turns that fit in ``token_budget`` tokens"""
+        lines: List[str] = []
+        used = 0
+        for user_message, reply in reversed(self.history(session_id)):
+            block = f"User: {user_message}\nAssistant: {reply}"
+            cost = estimate_tokens(block)
+            if used + cost > token_budget:
+                break
+            lines.append(block)
+            used += cost
+        return "\n".join(reversed(lines))
+
+    def clear(self, session_id: str) -> None:
+        with self._lock:
+            if session_id in self._sessions:
+                self._drop(session_id)
+
+    def _expire(self, now: float) -> None:
+        # LRU order means idle sessions sit at the front
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_seen <= self.idle_ttl:
+                break
+            self._drop(session_id)
+
+    def _evict_oldest(self) -> None:
+        session_id = next(iter(self._sessions))
+        self._drop(session_id)
+        self.evictions += 1
+
+    def _drop(self, session_id: str) -> None:
+        session = self._sessions.pop(session_id)
+        self._bytes -= session.size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "bytes": self._bytes,
+                "max_sessions": self.max_sessions,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions
+            }
@@ -1,22 +1,67 @@
+import asyncio
+import inspect
 import re
+import time
 from datetime import datetime, timedelta
-from typing import Tuple, List, Dict, Any
+from typing import Tuple, List, Dict, Any, AsyncIterator, Iterable, Optional
+from .intent_classifier import IntentClassifier, default_classifier
+from src.tools.gazetteer import Gazetteer, load_default_gazetteer
+from src.tools.circuit_breaker import CircuitBreaker, CircuitOpenError, get_breaker
+from src import metrics
+from src.models.hotel_record import HotelRecord
+
+NO_HOTELS_REPLY = "I couldn't find any hotels matching your criteria."
+LLM_UNAVAILABLE_REPLY = (
+    "Sorry, I can't answer that right now because my language model is unavailable. "
+    "Please try again in a few minutes."
+)
 
 class TourismAgent:
-    def __init__(self, llm_client, hotel_api):
+    def __init__(
+        self,
+        llm_client,
+        hotel_api,
+        async_llm_client=None,
+        completion_cache=None,
+        session_store=None,
+        history_token_budget: int = 256,
+        intent_classifier: Optional[IntentClassifier] = None,
+        gazetteer: Optional[Gazetteer] = None,
+        model_revision: str = "",
+        template_channels: Iterable[str] = (),
+        template_max_hotels: int = 5,
+        llm_breaker: Optional[CircuitBreaker] = None
+    ):
         self.llm = llm_client
+        self.async_llm = async_llm_client
         self.hotel_api = hotel_api
+        self.completion_cache = completion_cache
+        self.session_store = session_store
+        self.history_token_budget = history_token_budget
+        self.intent_classifier = intent_classifier or default_classifier
+        self.gazetteer = gazetteer or load_default_gazetteer()
+        # Part of every completion cache key, so a reloaded model never
+        # serves (or is served) completions cached by its predecessor
+        self.model_revision = model_revision
+        # Channels that get an instant templated hotel list, with the LLM
+        # summary delivered afterwards as a follow-up
+        self.template_channels = frozenset(template_channels)
+        self.template_max_hotels = template_max_hotels
+        self.llm_breaker = llm_breaker or get_breaker("hf_inference", max_timeout=120.0)
 
     def classify_intent(self, message: str) -> str:
-        message = message.lower()
-        hotel_keywords = ["hotel", "stay", "accommodation", "book", "reservation"]
-        if any(kw in message for kw in hotel_keywords):
-            return "hotel_search"
-        return "general_question"
+        return self.intent_classifier.classify(message)
+
+    def classify_intents(self, message: str) -> List[str]:
+        return self.intent_classifier.classify_all(message)
 
     def extract_parameters(self, message: str) -> Tuple[str, str]:
         location = "Vienna"
-        if " in " in message:
+        city = self.gazetteer.find_in_text(message) if self.gazetteer is not None else None
+        if city is not None:
+            # Canonical name; BookingAPIClient maps it to the MakCorps city id
+            location = city.name
+        elif " in " in message:
             location = message.split(" in ")[-1].split(" for ")[0].strip()
         today = datetime.now()
         if "tomorrow" in message:
@@ -28,55 +73,386 @@ class TourismAgent:
             date = (today + timedelta(days=days_until_saturday)).strftime("%Y-%m-%d")
         return location, date
 
-    def search_hotels(self, location: str, date: str) -> List[Dict[str, Any]]:
+    def search_hotels(self, location: str, date: str) -> List[HotelRecord]:
+        if self.hotel_api is not None:
+            return self.hotel_api.search_hotels(location, date).get("hotels", [])
         # Replace with your real hotel API call if available
+        slug = location.lower()
         return [
-            {
-                "name": f"Grand {location} Hotel",
-                "price": "$150/night",
-                "rating": 4.5,
-                "location": f"Central {location}",
-                "url": f"https://example.com/hotels/grand-{location.lower()}"
-            },
-            {
-                "name": f"{location} Riverside Inn",
-                "price": "$120/night",
-                "rating": 4.2,
-                "location": f"Riverside, {location}",
-                "url": f"https://example.com/hotels/{location.lower()}-riverside"
-            }
+            HotelRecord(
+                id=f"grand-{slug}",
+                name=f"Grand {location} Hotel",
+                rating=4.5,
+                price="$150/night",
+                location=f"Central {location}",
+                url=f"https://example.com/hotels/grand-{slug}",
+                currency="USD"
+            ),
+            HotelRecord(
+                id=f"{slug}-riverside",
+                name=f"{location} Riverside Inn",
+                rating=4.2,
+                price="$120/night",
+                location=f"Riverside, {location}",
+                url=f"https://example.com/hotels/{slug}-riverside",
+                currency="USD"
+            )
         ]
 
-    def generate_response(self, hotels: List[Dict[str, Any]]) -> str:
-        if not hotels:
-            return "I couldn't find any hotels matching your criteria."
-        prompt = (
+    async def asearch_hotels(self, location: str, date: str) -> List[HotelRecord]:
+        """Async variant of search_hotels that never blocks the event loop"""
+        if self.hotel_api is not None and hasattr(self.hotel_api, "asearch_hotels"):
+            result = await self.hotel_api.asearch_hotels(location, date)
+            return result.get("hotels", [])
+        if self.hotel_api is not None:
+            return await asyncio.to_thread(self.search_hotels, location, date)
+        return self.search_hotels(location, date)
+
+    def _hotel_summary_prompt(self, hotels: List[HotelRecord]) -> str:
+        return (
             "You are a helpful travel assistant. Summarize these hotel options "
             "in a friendly, concise way:\n\n"
-            + "\n".join([f"- {h['name']} ({h['price']}, Rating: {h['rating']}/5)" for h in hotels])
+            + "\n".join([f"- {h.name} ({h.price}, Rating: {h.rating}/5)" for h in hotels])
+        )
+
+    def _general_prompt(self, message: str, session_id: Optional[str] = None) -> str:
+        history = ""
+        if self.session_store is not None and session_id:
+            history = self.session_store.build_history(session_id, self.history_token_budget)
+        if history:
+            return (
+                "You are a helpful travel assistant. Continue this conversation and answer "
+                f"the last question in a friendly, informative way:\n\n{history}\nUser: {message}"
+            )
+        return (
+            "You are a helpful travel assistant. Answer this question "
+            f"in a friendly, informative way:\n\n{message}"
+        )
+
+    def _remember(self, session_id: Optional[str], message: str, response: str) -> None:
+        if self.session_store is not None and session_id:
+            self.session_store.append(session_id, message, response)
+
+    def _cache_params(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        return {**kwargs, "revision": self.model_revision} if self.model_revision else kwargs
+
+    def _generate(self, prompt: str, fallback: Optional[str] = LLM_UNAVAILABLE_REPLY, **kwargs) -> Optional[str]:
+        """Run text generation, served from the completion cache when possible
+
+        Returns ``fallback`` at once while the inference circuit is open.
+        """
+        try:
+            if self.completion_cache is None:
+                return self._generate_uncached(prompt, **kwargs)
+            return self.completion_cache.get_or_generate(
+                prompt, self._cache_params(kwargs), lambda: self._generate_uncached(prompt, **kwargs)
+            )
+        except CircuitOpenError:
+            return fallback
+
+    def _generate_uncached(self, prompt: str, **kwargs) -> str:
+        def call(timeout: float) -> str:
+            with metrics.track_outbound("hf_inference"):
+                return self.llm.text_generation(prompt, **kwargs)
+        return self.llm_breaker.call(call)
+
+    async def _agenerate(self, prompt: str, fallback: Optional[str] = LLM_UNAVAILABLE_REPLY, **kwargs) -> Optional[str]:
+        """Run text generation without blocking the event loop"""
+        try:
+            if self.completion_cache is None:
+                return await self._agenerate_uncached(prompt, **kwargs)
+            return await self.completion_cache.aget_or_generate(
+                prompt, self._cache_params(kwargs), lambda: self._agenerate_uncached(prompt, **kwargs)
+            )
+        except CircuitOpenError:
+            return fallback
+
+    async def _agenerate_uncached(self, prompt: str, **kwargs) -> str:
+        async def call(timeout: float) -> str:
+            with metrics.track_outbound("hf_inference"):
+                if self.async_llm is not None:
+                    return await self.async_llm.text_generation(prompt, **kwargs)
+                # Sync-only clients are pushed onto a worker thread
+                return await asyncio.to_thread(self.llm.text_generation, prompt, **kwargs)
+        # The breaker cancels the call at the adaptive timeout
+        return await self.llm_breaker.acall(call)
+
+    async def _astream(
+        self,
+        prompt: str,
+        fallback: Optional[str] = LLM_UNAVAILABLE_REPLY,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Yield generated text chunks as the backend produces them
+
+        While the inference circuit is open, yields ``fallback`` (nothing if None).
+        """
+        cache_key = None
+        if self.completion_cache is not None:
+            cache_key = self.completion_cache.make_key(prompt, self._cache_params(kwargs))
+            cached = self.completion_cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+
+        chunks = []
+        try:
+            async for token in self._astream_uncached(prompt, **kwargs):
+                chunks.append(token)
+                yield token
+        except CircuitOpenError:
+            if fallback is not None:
+                yield fallback
+            return
+        if cache_key is not None:
+            self.completion_cache.set(cache_key, "".join(chunks))
+
+    async def _astream_uncached(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        breaker = self.llm_breaker
+        if not breaker.allow():
+            raise CircuitOpenError(breaker.name)
+        # The adaptive timeout bounds the whole generation, checked per token
+        deadline = time.monotonic() + breaker.timeout()
+        start = time.perf_counter()
+        completed = False
+        try:
+            with metrics.track_outbound("hf_inference"):
+                if self.async_llm is None:
+                    # Sync-only clients cannot stream; emit the full completion at once
+                    text = await asyncio.wait_for(
+                        asyncio.to_thread(self.llm.text_generation, prompt, **kwargs),
+                        deadline - time.monotonic()
+                    )
+                    completed = True
+                    yield text
+                else:
+                    stream = await asyncio.wait_for(
+                        self.async_llm.text_generation(prompt, stream=True, **kwargs),
+                        deadline - time.monotonic()
+                    )
+                    iterator = stream.__aiter__()
+                    while True:
+                        try:
+                            token = await asyncio.wait_for(iterator.__anext__(), deadline - time.monotonic())
+                        except StopAsyncIteration:
+                            break
+                        yield token
+                    completed = True
+        except Exception:
+            breaker.record_failure()
+            raise
+        finally:
+            if completed:
+                breaker.record_success(time.perf_counter() - start)
+            else:
+                breaker.release()
+
+    async def warm_up(self, messages: List[str]) -> None:
+        """Run uncached generations so the backend is hot before taking traffic
+
+        Raises if the backend fails, which aborts a reload.
+        """
+        for message in messages:
+            await self._agenerate_uncached(self._general_prompt(message), max_new_tokens=200)
+
+    async def aclose(self) -> None:
+        """Release backend resources (e.g. the local batching thread)"""
+        for client in (self.async_llm, self.llm):
+            close = getattr(client, "close", None)
+            if close is None:
+                continue
+            try:
+                if inspect.iscoroutinefunction(close):
+                    await close()
+                else:
+                    await asyncio.to_thread(close)
+            except Exception:
+                pass
+
+    def render_hotel_list(self, hotels: List[HotelRecord]) -> str:
+        """Deterministic hotel answer, rendered without the LLM"""
+        if not hotels:
+            return NO_HOTELS_REPLY
+        lines = ["Here are the top hotels I found:"]
+        for i, hotel in enumerate(hotels[:self.template_max_hotels], 1):
+            price = hotel.price if isinstance(hotel.price, str) else f"{hotel.price} {hotel.currency}"
+            lines.append(f"{i}. {hotel.name} - {price}, rated {hotel.rating}/5")
+            if hotel.url:
+                lines.append(f"   {hotel.url}")
+        return "\n".join(lines)
+
+    def generate_response(self, hotels: List[HotelRecord]) -> str:
+        if not hotels:
+            return NO_HOTELS_REPLY
+        return self._generate(
+            self._hotel_summary_prompt(hotels),
+            fallback=self.render_hotel_list(hotels),
+            max_new_tokens=200,
+            temperature=0.7
         )
-        return self.llm.text_generation(
-            prompt,
+
+    async def agenerate_response(self, hotels: List[HotelRecord]) -> str:
+        if not hotels:
+            return NO_HOTELS_REPLY
+        return await self._agenerate(
+            self._hotel_summary_prompt(hotels),
+            fallback=self.render_hotel_list(hotels),
             max_new_tokens=200,
             temperature=0.7
         )
 
-    def process_message(self, message: str) -> dict:
-        intent = self.classify_intent(message)
-        if intent == "hotel_search":
-            location, date = self.extract_parameters(message)
-            hotels = self.search_hotels(location, date)
-            response = self.generate_response(hotels)
-            return {
-                "response": response,
-                "hotels": hotels
-            }
-        else:
-            prompt = (
-                "You are a helpful travel assistant. Answer this question "
-                f"in a friendly, informative way:\n\n{message}"
-            )
-            return {
-                "response": self.llm.text_generation(prompt, max_new_tokens=200),
-                "hotels": []
-            }
\ No newline at end of file
+    def _summary_followup(self, hotels: List[HotelRecord]) -> Optional[str]:
+        """Deferred summary after a templated list; None while the model is unavailable
+
+        The list was already sent, so there is no fallback text to repeat.
+        """
+        return self._generate(
+            self._hotel_summary_prompt(hotels), fallback=None, max_new_tokens=200, temperature=0.7
+        )
+
+    async def _asummary_followup(self, hotels: List[HotelRecord]) -> Optional[str]:
+        return await self._agenerate(
+            self._hotel_summary_prompt(hotels), fallback=None, max_new_tokens=200, temperature=0.7
+        )
+
+    def process_message(self, message: str, session_id: Optional[str] = None, channel: str = "web") -> dict:
+        """Answer one message
+
+        On template channels a hotel search returns the rendered list at once
+        and a ``followup`` callable that produces the LLM summary (or None
+        when the model is unavailable); callers that can send a second
+        message invoke it after replying and skip a None summary.
+        """
+        with metrics.track_request(channel):
+            with metrics.track_stage(channel, "classify_intent"):
+                intent = self.classify_intent(message)
+            if intent == "hotel_search":
+                with metrics.track_stage(channel, "extract_parameters"):
+                    location, date = self.extract_parameters(message)
+                with metrics.track_stage(channel, "search_hotels"):
+                    hotels = self.search_hotels(location, date)
+                if channel in self.template_channels:
+                    with metrics.track_stage(channel, "render_template"):
+                        response = self.render_hotel_list(hotels)
+                    result = {
+                        "response": response,
+                        "hotels": hotels,
+                        "followup": (lambda: self._summary_followup(hotels)) if hotels else None
+                    }
+                else:
+                    with metrics.track_stage(channel, "llm_generate"):
+                        response = self.generate_response(hotels)
+                    result = {
+                        "response": response,
+                        "hotels": hotels
+                    }
+            else:
+                with metrics.track_stage(channel, "build_prompt"):
+                    prompt = self._general_prompt(message, session_id)
+                with metrics.track_stage(channel, "llm_generate"):
+                    response = self._generate(prompt, max_new_tokens=200)
+                result = {
+                    "response": response,
+                    "hotels": []
+                }
+            self._remember(session_id, message, result["response"])
+            return result
+
+    async def aprocess_message(self, message: str, session_id: Optional[str] = None, channel: str = "web") -> dict:
+        """Async counterpart of process_message for use inside request handlers
+
+        ``followup``, when present, is a coroutine function returning the
+        deferred hotel summary, or None when the model is unavailable.
+        """
+        with metrics.track_request(channel):
+            with metrics.track_stage(channel, "classify_intent"):
+                intent = self.classify_intent(message)
+            if intent == "hotel_search":
+                with metrics.track_stage(channel, "extract_parameters"):
+                    location, date = self.extract_parameters(message)
+                with metrics.track_stage(channel, "search_hotels"):
+                    hotels = await self.asearch_hotels(location, date)
+                if channel in self.template_channels:
+                    with metrics.track_stage(channel, "render_template"):
+                        response = self.render_hotel_list(hotels)
+                    result = {
+                        "response": response,
+                        "hotels": hotels,
+                        "followup": (lambda: self._asummary_followup(hotels)) if hotels else None
+                    }
+                else:
+                    with metrics.track_stage(channel, "llm_generate"):
+                        response = await self.agenerate_response(hotels)
+                    result = {
+                        "response": response,
+                        "hotels": hotels
+                    }
+            else:
+                with metrics.track_stage(channel, "build_prompt"):
+                    prompt = self._general_prompt(message, session_id)
+                with metrics.track_stage(channel, "llm_generate"):
+                    response = await self._agenerate(prompt, max_new_tokens=200)
+                result = {
+                    "response": response,
+                    "hotels": []
+                }
+            self._remember(session_id, message, result["response"])
+            return result
+
+    async def astream_message(
+        self,
+        message: str,
+        session_id: Optional[str] = None,
+        channel: str = "web"
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Process a message and yield events while the response is generated
+
+        Hotel searches emit a ``hotels`` event before the summary tokens. On
+        template channels the rendered list is sent as a single ``token``
+        event and the LLM summary follows as ``summary`` events. Every stream
+        ends with a ``done`` event carrying the full response text.
+        """
+        with metrics.track_request(channel):
+            with metrics.track_stage(channel, "classify_intent"):
+                intent = self.classify_intent(message)
+            if intent == "hotel_search":
+                with metrics.track_stage(channel, "extract_parameters"):
+                    location, date = self.extract_parameters(message)
+                with metrics.track_stage(channel, "search_hotels"):
+                    hotels = await self.asearch_hotels(location, date)
+                yield {"event": "hotels", "data": hotels}
+                if not hotels:
+                    response = NO_HOTELS_REPLY
+                    yield {"event": "token", "data": response}
+                    self._remember(session_id, message, response)
+                    yield {"event": "done", "data": {"response": response}}
+                    return
+                if channel in self.template_channels:
+                    with metrics.track_stage(channel, "render_template"):
+                        response = self.render_hotel_list(hotels)
+                    yield {"event": "token", "data": response}
+                    self._remember(session_id, message, response)
+                    chunks = []
+                    with metrics.track_stage(channel, "llm_generate"):
+                        async for token in self._astream(
+                            self._hotel_summary_prompt(hotels), fallback=None, max_new_tokens=200, temperature=0.7
+                        ):
+                            chunks.append(token)
+                            yield {"event": "summary", "data": token}
+                    yield {"event": "done", "data": {"response": response, "summary": "".join(chunks)}}
+                    return
+                prompt = self._hotel_summary_prompt(hotels)
+                kwargs = {"fallback": self.render_hotel_list(hotels), "max_new_tokens": 200, "temperature": 0.7}
+            else:
+                with metrics.track_stage(channel, "build_prompt"):
+                    prompt = self._general_prompt(message, session_id)
+                kwargs = {"max_new_tokens": 200}
+
+            chunks = []
+            with metrics.track_stage(channel, "llm_generate"):
+                async for token in self._astream(prompt, **kwargs):
+                    chunks.append(token)
+                    yield {"event": "token", "data": token}
+            response = "".join(chunks)
+            self._remember(session_id, message, response)
+            yield {"event": "done", "data": {"response": response}}
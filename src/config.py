@@ -1,6 +1,5 @@
 from dataclasses import dataclass
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, pipeline
-from langchain.llms import HuggingFacePipeline
+from typing import Optional
 
 @dataclass
 class ModelConfig:
@@ -8,6 +7,10 @@ class ModelConfig:
     max_length: int = 512
     temperature: float = 0.7
     device: int = -1  # CPU
+    max_batch_size: int = 8
+    max_batch_wait_ms: float = 10.0
+    precision: str = "fp32"  # "fp32" or "int8" (CPU only)
+    quantized_path: Optional[str] = None  # Saved int8 state dict, created on first load
     
     def get_model_kwargs(self):
         return {
@@ -18,8 +21,12 @@ class ModelConfig:
     
     def create_pipeline(self):
         """Initialize model, tokenizer and create pipeline"""
+        from transformers import AutoTokenizer, pipeline
+        from langchain.llms import HuggingFacePipeline
+        from src.models.quantization import load_seq2seq_model
+
         tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-        model = AutoModelForSeq2SeqLM.from_pretrained(self.model_name)
+        model = load_seq2seq_model(self.model_name, self.precision, self.quantized_path)
         
         hf_pipeline = pipeline(
             "text2text-generation",
@@ -30,3 +37,17 @@ class ModelConfig:
         
         return HuggingFacePipeline(pipeline=hf_pipeline)
 
+    def create_local_backend(self):
+        """Create an in-process, micro-batching backend for TourismAgent"""
+        from src.models.local_backend import LocalSeq2SeqBackend
+
+        return LocalSeq2SeqBackend.from_pretrained(
+            self.model_name,
+            device=self.device,
+            precision=self.precision,
+            quantized_path=self.quantized_path,
+            max_batch_size=self.max_batch_size,
+            max_wait_ms=self.max_batch_wait_ms,
+            max_input_length=self.max_length
+        )
+
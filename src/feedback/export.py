@@ -0,0 +1,390 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+RATING_SCORES = {"up": 1, "down": -1}
+
+
+@dataclass
+class ExportConfig:
+    """Filtering, pairing and output options for an RLHF export"""
+    output_dir: str
+    format: str = "jsonl"  # "jsonl" or "parquet"
+    partitions: int = 64
+    max_partition_records: int = 200_000
+    shard_size: int = 10_000
+    eval_fraction: float = 0.05
+    max_pairs_per_prompt: int = 4
+    max_sft_per_prompt: int = 2
+    min_response_chars: int = 1
+    since: Optional[float] = None
+    until: Optional[float] = None
+    channels: Optional[List[str]] = None
+    checkpoint_every: int = 10_000
+
+
+@dataclass
+class Checkpoint:
+    """Progress of an export, persisted after every committed unit of work"""
+    phase: str = "spill"  # "spill", "pair" or "done"
+    cursor: Any = None
+    spilled: int = 0
+    filtered_out: int = 0
+    done_partitions: List[int] = field(default_factory=list)
+    counts: Dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: str) -> "Checkpoint":
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+    def save(self, path: str) -> None:
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(asdict(self), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+
+def prompt_key(message: str) -> str:
+    return _WHITESPACE.sub(" ", message).strip().casefold()
+
+
+def _bucket(key: str, buckets: int) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big") % buckets
+
+
+def is_eval(key: str, eval_fraction: float) -> bool:
+    """Stable split on the prompt, so one prompt never lands in both splits"""
+    digest = hashlib.sha1(key.encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "big") / 2 ** 32 < eval_fraction
+
+
+def filter_records(
+    records: Iterable[Tuple[Any, Dict[str, Any]]],
+    config: ExportConfig,
+    rejected: List[int]
+) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+    """Normalize rated records with a usable prompt and response
+
+    Dropped records are yielded as ``(cursor, None)`` so the checkpoint
+    cursor still advances past them; ``rejected[0]`` counts them.
+    """
+    for cursor, record in records:
+        message = (record.get("message") or "").strip()
+        response = (record.get("response") or "").strip()
+        timestamp = record.get("timestamp") or 0
+        if (
+            record.get("rating") not in RATING_SCORES
+            or not message
+            or len(response) < config.min_response_chars
+            or (config.since is not None and timestamp < config.since)
+            or (config.until is not None and timestamp >= config.until)
+            or (config.channels and record.get("channel", "web") not in config.channels)
+        ):
+            rejected[0] += 1
+            yield cursor, None
+            continue
+        record_id = record.get("id") or hashlib.sha1(
+            f"{timestamp}\x00{message}\x00{response}".encode("utf-8")
+        ).hexdigest()
+        yield cursor, {
+            "id": record_id,
+            "message": message,
+            "response": response,
+            "score": RATING_SCORES[record["rating"]]
+        }
+
+
+def pair_prompt(
+    records: List[Dict[str, Any]],
+    max_pairs: int,
+    max_sft: int
+) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+    """Turn every rating of one prompt into preference pairs and SFT examples
+
+    Ratings of the same response text are summed; responses with a positive
+    net score are preferred, negative ones rejected.
+    """
+    prompt = records[0]["message"]
+    scores: Dict[str, int] = {}
+    texts: Dict[str, str] = {}
+    for record in records:
+        key = _WHITESPACE.sub(" ", record["response"]).strip()
+        texts.setdefault(key, record["response"])
+        scores[key] = scores.get(key, 0) + record["score"]
+
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    chosen = [texts[k] for k, score in ranked if score > 0]
+    rejected = [texts[k] for k, score in reversed(ranked) if score < 0]
+
+    pairs = [
+        {"prompt": prompt, "chosen": good, "rejected": bad}
+        for good in chosen for bad in rejected
+    ][:max_pairs]
+    sft = [{"prompt": prompt, "response": good} for good in chosen[:max_sft]]
+    return pairs, sft
+
+
+class ShardWriter:
+    """Write rows into numbered shards of at most ``shard_size`` rows
+
+    Only the current shard is open (JSONL) or buffered (Parquet), so memory
+    stays bounded by ``shard_size`` regardless of the dataset size.
+    """
+
+    def __init__(self, directory: str, prefix: str, shard_size: int, fmt: str = "jsonl"):
+        if fmt == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow)")
+        elif fmt != "jsonl":
+            raise ValueError(f"Unknown output format: {fmt}")
+        self.directory = directory
+        self.prefix = prefix
+        self.shard_size = shard_size
+        self.format = fmt
+        self.rows = 0
+        self._shard = -1
+        self._in_shard = 0
+        self._file = None
+        self._buffer: List[Dict[str, Any]] = []
+
+    def write(self, row: Dict[str, Any]) -> None:
+        if self._shard < 0 or self._in_shard >= self.shard_size:
+            self._roll()
+        if self.format == "jsonl":
+            self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        else:
+            self._buffer.append(row)
+        self._in_shard += 1
+        self.rows += 1
+
+    def _path(self) -> str:
+        return os.path.join(self.directory, f"{self.prefix}-{self._shard:05d}.{self.format}")
+
+    def _roll(self) -> None:
+        self._close_shard()
+        self._shard += 1
+        self._in_shard = 0
+        if self.format == "jsonl":
+            self._file = open(self._path(), "w", encoding="utf-8")
+
+    def _close_shard(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._buffer:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            pq.write_table(pa.Table.from_pylist(self._buffer), self._path())
+            self._buffer = []
+
+    def close(self) -> None:
+        self._close_shard()
+
+
+class RLHFExporter:
+    """Stream feedback records into sharded preference and SFT datasets
+
+    1. Spill: records are streamed from the backend, filtered and appended
+       to one of ``partitions`` files by a hash of the prompt, so every
+       rating of a prompt ends up in the same partition.
+    2. Pair: partitions are loaded one at a time, grouped by prompt and
+       turned into (prompt, chosen, rejected) pairs and SFT examples, split
+       into train/eval by prompt hash and written as shards.
+
+    A partition holding more than ``max_partition_records`` lines is
+    re-split on disk by a salted prompt hash before pairing, so peak memory
+    is at most ``max_partition_records`` records plus one output shard,
+    whatever the dataset size. (Only a single prompt rated more often than
+    that is loaded whole.) A checkpoint is saved every ``checkpoint_every``
+    spilled records and after each paired partition; rerunning with the
+    same output directory resumes from it. Records re-spilled after a crash
+    are de-duplicated by id.
+    """
+
+    OUTPUTS = ("train-pairs", "eval-pairs", "train-sft", "eval-sft")
+
+    def __init__(self, backend, config: ExportConfig):
+        self.backend = backend
+        self.config = config
+        self.spill_dir = os.path.join(config.output_dir, "_spill")
+        self.checkpoint_path = os.path.join(config.output_dir, "checkpoint.json")
+
+    def _output_files(self) -> List[str]:
+        return [
+            path
+            for name in self.OUTPUTS
+            for fmt in ("jsonl", "parquet")
+            for path in glob.glob(os.path.join(self.config.output_dir, f"{name}-p*.{fmt}"))
+        ]
+
+    def reset(self) -> None:
+        """Discard a previous export: only the files this exporter writes are removed
+
+        The output directory itself and anything else in it are left alone.
+        """
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+        for path in [self.checkpoint_path, os.path.join(self.config.output_dir, "manifest.json")]:
+            if os.path.exists(path):
+                os.remove(path)
+        for path in self._output_files():
+            os.remove(path)
+
+    def run(self) -> Dict[str, Any]:
+        os.makedirs(self.spill_dir, exist_ok=True)
+        checkpoint = Checkpoint.load(self.checkpoint_path)
+        if checkpoint.phase == "spill":
+            self._spill(checkpoint)
+        if checkpoint.phase == "pair":
+            self._pair(checkpoint)
+        return self._manifest(checkpoint)
+
+    def _partition_path(self, partition: int) -> str:
+        return os.path.join(self.spill_dir, f"part-{partition:04d}.jsonl")
+
+    def _spill(self, checkpoint: Checkpoint) -> None:
+        files = [open(self._partition_path(p), "a", encoding="utf-8") for p in range(self.config.partitions)]
+        rejected = [checkpoint.filtered_out]
+
+        def commit(cursor):
+            for f in files:
+                f.flush()
+            checkpoint.cursor = cursor
+            checkpoint.filtered_out = rejected[0]
+            checkpoint.save(self.checkpoint_path)
+
+        try:
+            cursor = checkpoint.cursor
+            since_commit = 0
+            for cursor, record in filter_records(self.backend.iter_records(checkpoint.cursor), self.config, rejected):
+                if record is not None:
+                    key = prompt_key(record["message"])
+                    files[_bucket(key, self.config.partitions)].write(json.dumps(record, ensure_ascii=False) + "\n")
+                    checkpoint.spilled += 1
+                since_commit += 1
+                if since_commit >= self.config.checkpoint_every:
+                    commit(cursor)
+                    since_commit = 0
+            commit(cursor)
+        finally:
+            for f in files:
+                f.close()
+        checkpoint.phase = "pair"
+        checkpoint.save(self.checkpoint_path)
+        logger.info(f"Spilled {checkpoint.spilled} records ({checkpoint.filtered_out} filtered out)")
+
+    def _load_groups(self, path: str) -> Dict[str, List[Dict[str, Any]]]:
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        seen = set()
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn line from an interrupted spill
+                if record["id"] in seen:
+                    continue
+                seen.add(record["id"])
+                groups.setdefault(prompt_key(record["message"]), []).append(record)
+        return groups
+
+    def _iter_groups(self, path: str, depth: int = 0) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """Prompt groups of a spill file, split further while it is over the record limit"""
+        with open(path, encoding="utf-8") as f:
+            count = sum(1 for _ in f)
+        limit = self.config.max_partition_records
+        if count <= limit:
+            yield from self._load_groups(path).items()
+            return
+
+        parts = -(-count // limit)
+        sub_paths = [f"{path}.{depth}-{i:04d}" for i in range(parts)]
+        counts = [0] * parts
+        files = [open(p, "w", encoding="utf-8") for p in sub_paths]
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    # Salted by depth so the split differs from the one that built this file
+                    part = _bucket(f"{depth}\x00{prompt_key(record['message'])}", parts)
+                    files[part].write(line)
+                    counts[part] += 1
+        finally:
+            for sub in files:
+                sub.close()
+        for sub_path, sub_count in zip(sub_paths, counts):
+            if sub_count == count:
+                # One prompt (or a hash clash) holds everything; splitting cannot help
+                yield from self._load_groups(sub_path).items()
+            else:
+                yield from self._iter_groups(sub_path, depth + 1)
+            os.remove(sub_path)
+
+    def _pair(self, checkpoint: Checkpoint) -> None:
+        config = self.config
+        for partition in range(config.partitions):
+            if partition in checkpoint.done_partitions:
+                continue
+            # Output and sub-splits of a partition interrupted mid-way are discarded and redone
+            for path in glob.glob(os.path.join(config.output_dir, f"*-p{partition:04d}-*.{config.format}")):
+                os.remove(path)
+            for path in glob.glob(self._partition_path(partition) + ".*"):
+                os.remove(path)
+            writers = {
+                name: ShardWriter(config.output_dir, f"{name}-p{partition:04d}", config.shard_size, config.format)
+                for name in self.OUTPUTS
+            }
+            for key, records in self._iter_groups(self._partition_path(partition)):
+                pairs, sft = pair_prompt(records, config.max_pairs_per_prompt, config.max_sft_per_prompt)
+                split = "eval" if is_eval(key, config.eval_fraction) else "train"
+                for row in pairs:
+                    writers[f"{split}-pairs"].write(row)
+                for row in sft:
+                    writers[f"{split}-sft"].write(row)
+            for name, writer in writers.items():
+                writer.close()
+                checkpoint.counts[name] = checkpoint.counts.get(name, 0) + writer.rows
+            checkpoint.done_partitions.append(partition)
+            checkpoint.save(self.checkpoint_path)
+
+        checkpoint.phase = "done"
+        checkpoint.save(self.checkpoint_path)
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    def _manifest(self, checkpoint: Checkpoint) -> Dict[str, Any]:
+        manifest = {
+            "format": self.config.format,
+            "records": checkpoint.spilled,
+            "filtered_out": checkpoint.filtered_out,
+            "counts": checkpoint.counts,
+            "files": {
+                name: sorted(
+                    os.path.basename(p)
+                    for p in glob.glob(os.path.join(self.config.output_dir, f"{name}-p*.{self.config.format}"))
+                )
+                for name in self.OUTPUTS
+            }
+        }
+        with open(os.path.join(self.config.output_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
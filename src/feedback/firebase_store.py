@@ -1,7 +1,118 @@
-def save_feedback(feedback_data):
-    """Save feedback data to Firebase."""
-    # Implementation for saving feedback to Firebase goes here
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-def retrieve_feedback():
+logger = logging.getLogger(__name__)
+
+# Firebase is initialized on first use rather than at import time
+has_firebase = None
+
+# Firestore rejects batches with more than 500 writes
+FIRESTORE_BATCH_LIMIT = 500
+
+
+def init_firebase() -> bool:
+    """Initialize Firebase once, if configured and installed"""
+    global has_firebase
+    if has_firebase is not None:
+        return has_firebase
+    has_firebase = False
+    if not os.getenv("FIREBASE_CREDENTIALS"):
+        logger.info("Firebase not configured")
+        return has_firebase
+    try:
+        from firebase_admin import credentials, initialize_app
+    except ImportError:
+        logger.warning("Firebase Admin SDK not installed. Firebase features disabled")
+        return has_firebase
+    try:
+        firebase_creds = json.loads(os.getenv("FIREBASE_CREDENTIALS"))
+        cred = credentials.Certificate(firebase_creds)
+        initialize_app(cred)
+        has_firebase = True
+        logger.info("Firebase initialized successfully")
+    except Exception as e:
+        logger.error(f"Firebase initialization failed: {str(e)}")
+    return has_firebase
+
+
+class FirebaseBackend:
+    """Feedback backend writing to a Firestore collection
+
+    Records are stored under their ``id``, so replaying a journal after a
+    crash overwrites documents instead of duplicating them.
+    """
+
+    def __init__(self, collection: str = "feedback"):
+        if not init_firebase():
+            raise RuntimeError("Firebase is not configured")
+        from firebase_admin import firestore
+
+        self.db = firestore.client()
+        self.collection = collection
+
+    def write_batch(self, records: List[Dict[str, Any]]) -> None:
+        collection = self.db.collection(self.collection)
+        for start in range(0, len(records), FIRESTORE_BATCH_LIMIT):
+            batch = self.db.batch()
+            for record in records[start:start + FIRESTORE_BATCH_LIMIT]:
+                batch.set(collection.document(record["id"]), record)
+            batch.commit()
+
+    def read(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        query = self.db.collection(self.collection).order_by("timestamp")
+        if limit is not None:
+            query = query.limit(limit)
+        return [doc.to_dict() for doc in query.stream()]
+
+    def iter_records(
+        self,
+        cursor: Optional[List[Any]] = None,
+        page_size: int = 500
+    ) -> Iterator[Tuple[List[Any], Dict[str, Any]]]:
+        """Stream (cursor, record) pairs in (timestamp, id) order, one page at a time"""
+        base = self.db.collection(self.collection).order_by("timestamp").order_by("id")
+        while True:
+            query = base
+            if cursor:
+                query = query.start_after({"timestamp": cursor[0], "id": cursor[1]})
+            count = 0
+            for doc in query.limit(page_size).stream():
+                record = doc.to_dict()
+                cursor = [record["timestamp"], record["id"]]
+                count += 1
+                yield cursor, record
+            if count < page_size:
+                return
+
+    def close(self) -> None:
+        pass
+
+
+_backend: Optional[FirebaseBackend] = None
+
+
+def _default_backend() -> FirebaseBackend:
+    global _backend
+    if _backend is None:
+        _backend = FirebaseBackend()
+    return _backend
+
+
+def save_feedback(feedback_data: Dict[str, Any]) -> str:
+    """Save feedback data to Firebase and return its id.
+
+    Like FeedbackWriter.record, an ``id`` and ``timestamp`` are assigned
+    unless the caller supplied them.
+    """
+    record = {"id": uuid.uuid4().hex, "timestamp": time.time(), **feedback_data}
+    _default_backend().write_batch([record])
+    return record["id"]
+
+
+def retrieve_feedback(limit: Optional[int] = None) -> List[Dict[str, Any]]:
     """Retrieve feedback data from Firebase."""
-    # Implementation for retrieving feedback from Firebase goes here
\ No newline at end of file
+    return _default_backend().read(limit)
@@ -0,0 +1,155 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _ensure_parent(path: str) -> None:
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+
+
+class JSONLBackend:
+    """Append-only JSON Lines feedback file for offline runs
+
+    A replayed journal may append a record twice; ``read`` keeps the first
+    copy of each ``id``. A write torn by a crash leaves a partial last line;
+    the next write starts on a fresh line, and readers skip the partial one
+    (``iter_records`` counts them in ``malformed``).
+    """
+
+    def __init__(self, path: str):
+        _ensure_parent(path)
+        self.path = path
+        self._lock = threading.Lock()
+        self.malformed = 0
+
+    def write_batch(self, records: List[Dict[str, Any]]) -> None:
+        data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode("utf-8")
+        with self._lock, open(self.path, "a+b") as f:
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    # Terminate the torn line so the first record is not glued onto it
+                    data = b"\n" + data
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def read(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return []
+        seen, records = set(), []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn line from an interrupted write
+                if record.get("id") in seen:
+                    continue
+                seen.add(record.get("id"))
+                records.append(record)
+                if limit is not None and len(records) >= limit:
+                    break
+        return records
+
+    def iter_records(self, cursor: Optional[int] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Stream (cursor, record) pairs; the cursor is the byte offset after the record"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            f.seek(cursor or 0)
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    if not line.endswith(b"\n"):
+                        break  # torn final line, still being written
+                    self.malformed += 1
+                    logger.warning(f"Skipping malformed line in {self.path} before byte {f.tell()}")
+                    continue
+                yield f.tell(), record
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteBackend:
+    """SQLite feedback table for tests and offline runs; ``id`` is the primary key"""
+
+    def __init__(self, path: str):
+        if path != ":memory:":
+            _ensure_parent(path)
+        self.path = path
+        self._lock = threading.Lock()
+        # Flushes run on the writer thread, reads on request threads
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS feedback ("
+            "id TEXT PRIMARY KEY, timestamp REAL, record TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def write_batch(self, records: List[Dict[str, Any]]) -> None:
+        rows = [(r["id"], r.get("timestamp"), json.dumps(r, ensure_ascii=False)) for r in records]
+        with self._lock:
+            self._conn.executemany("INSERT OR IGNORE INTO feedback VALUES (?, ?, ?)", rows)
+            self._conn.commit()
+
+    def read(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        sql = "SELECT record FROM feedback ORDER BY timestamp"
+        params: tuple = ()
+        if limit is not None:
+            sql += " LIMIT ?"
+            params = (limit,)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def iter_records(
+        self,
+        cursor: Optional[List[Any]] = None,
+        page_size: int = 1000
+    ) -> Iterator[Tuple[List[Any], Dict[str, Any]]]:
+        """Stream (cursor, record) pairs in (timestamp, id) order, one page at a time"""
+        after = tuple(cursor) if cursor else (float("-inf"), "")
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT timestamp, id, record FROM feedback WHERE (timestamp, id) > (?, ?) "
+                    "ORDER BY timestamp, id LIMIT ?",
+                    (*after, page_size)
+                ).fetchall()
+            for timestamp, record_id, record in rows:
+                yield [timestamp, record_id], json.loads(record)
+            if len(rows) < page_size:
+                return
+            after = (rows[-1][0], rows[-1][1])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_backend(kind: str, path: Optional[str] = None):
+    """Build a feedback backend: "firebase", "jsonl", "sqlite" or "auto"
+
+    "auto" uses Firebase when it is configured and a local JSONL file otherwise.
+    """
+    if kind in ("auto", "firebase"):
+        from .firebase_store import FirebaseBackend, init_firebase
+
+        if kind == "firebase" or init_firebase():
+            return FirebaseBackend()
+        kind = "jsonl"
+    if kind == "jsonl":
+        return JSONLBackend(path or os.path.join("data", "feedback.jsonl"))
+    if kind == "sqlite":
+        return SQLiteBackend(path or os.path.join("data", "feedback.db"))
+    raise ValueError(f"Unknown feedback backend: {kind}")
@@ -0,0 +1,195 @@
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _load_segment(path: str) -> List[Dict[str, Any]]:
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # A crash mid-write leaves at most one torn line at the end
+                logger.warning(f"Skipping torn journal line in {path}")
+    return records
+
+
+class FeedbackWriter:
+    """Write-behind buffer in front of a feedback backend
+
+    ``record`` appends the feedback to a local journal segment and an
+    in-memory buffer, then returns; it never waits on the backend. A
+    background thread flushes the buffer with one ``write_batch`` call when
+    ``max_batch`` records are waiting or every ``flush_interval`` seconds.
+
+    Each flushed batch owns one journal segment, deleted only after the
+    backend accepted the batch. Segments left behind by a crash or a failed
+    flush are replayed on the next ``start``, so feedback survives process
+    restarts. Backends key records by ``id``, which makes replays idempotent.
+    Without a journal, failed batches are retained in memory up to
+    ``max_pending`` records.
+    """
+
+    def __init__(
+        self,
+        backend,
+        journal_path: Optional[str] = None,
+        max_batch: int = 100,
+        flush_interval: float = 5.0,
+        max_pending: int = 10_000,
+        fsync: bool = False
+    ):
+        self.backend = backend
+        self.journal_path = journal_path
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._buffer: List[Dict[str, Any]] = []
+        # (segment path or None, records or None to reload from the segment)
+        self._pending: List[Tuple[Optional[str], Optional[List[Dict[str, Any]]]]] = []
+        self._journal = None
+        self._segment: Optional[str] = None
+        self._next_segment = 0
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self.recorded = 0
+        self.flushed = 0
+        self.failed_flushes = 0
+        self.dropped = 0
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        if self.journal_path:
+            self._recover()
+            self._open_segment()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._loop, name="feedback-writer", daemon=True)
+        self._thread.start()
+
+    def record(self, feedback: Dict[str, Any]) -> str:
+        """Buffer one feedback record and return its id; never blocks on the backend"""
+        record = {"id": uuid.uuid4().hex, "timestamp": time.time(), **feedback}
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._journal is not None:
+                self._journal.write(line)
+                self._journal.flush()
+                if self.fsync:
+                    os.fsync(self._journal.fileno())
+            self._buffer.append(record)
+            self.recorded += 1
+            full = len(self._buffer) >= self.max_batch
+        if full:
+            self._wake.set()
+        return record["id"]
+
+    def flush(self) -> None:
+        """Hand buffered and previously failed batches to the backend
+
+        Called from the writer thread; call directly only when it is stopped.
+        """
+        with self._lock:
+            if self._buffer:
+                batch, self._buffer = self._buffer, []
+                self._pending.append((self._segment, batch))
+                if self._journal is not None:
+                    self._journal.close()
+                    self._open_segment()
+
+        while self._pending:
+            segment, records = self._pending[0]
+            if records is None:
+                records = _load_segment(segment)
+            try:
+                if records:
+                    self.backend.write_batch(records)
+            except Exception as e:
+                self.failed_flushes += 1
+                logger.error(f"Feedback flush of {len(records)} records failed, will retry: {str(e)}")
+                if segment is not None:
+                    # The journal segment holds them; don't keep a second copy in memory
+                    self._pending[0] = (segment, None)
+                else:
+                    self._pending[0] = (None, records)
+                    self._trim_pending()
+                return
+            self._pending.pop(0)
+            self.flushed += len(records)
+            if segment is not None:
+                os.remove(segment)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Stop the writer thread after a final flush"""
+        if self._thread is not None:
+            self._stopping = True
+            self._wake.set()
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+                if not self._pending and os.path.getsize(self._segment) == 0:
+                    os.remove(self._segment)
+        self.backend.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "buffered": len(self._buffer),
+            "pending_batches": len(self._pending),
+            "recorded": self.recorded,
+            "flushed": self.flushed,
+            "failed_flushes": self.failed_flushes,
+            "dropped": self.dropped
+        }
+
+    def _loop(self) -> None:
+        while not self._stopping:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Feedback writer error: {str(e)}")
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Final feedback flush failed: {str(e)}")
+
+    def _segments(self) -> List[str]:
+        return sorted(glob.glob(f"{glob.escape(self.journal_path)}.*[0-9]"))
+
+    def _recover(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.journal_path))
+        os.makedirs(directory, exist_ok=True)
+        segments = self._segments()
+        for segment in segments:
+            self._pending.append((segment, None))
+        if segments:
+            self._next_segment = int(segments[-1].rsplit(".", 1)[1]) + 1
+            logger.info(f"Replaying {len(segments)} feedback journal segments")
+
+    def _open_segment(self) -> None:
+        self._segment = f"{self.journal_path}.{self._next_segment:08d}"
+        self._next_segment += 1
+        self._journal = open(self._segment, "a", encoding="utf-8")
+
+    def _trim_pending(self) -> None:
+        total = sum(len(records) for _, records in self._pending)
+        while total > self.max_pending and len(self._pending) > 1:
+            _, records = self._pending.pop(0)
+            total -= len(records)
+            self.dropped += len(records)
+            logger.warning(f"Feedback backlog over {self.max_pending} records, dropped {len(records)}")
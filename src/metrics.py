@@ -0,0 +1,196 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.label_names, labels)} {value}" for labels, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._values.items()]
+        lines = self._header()
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = _format_labels(self.label_names, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            cumulative += series[len(self.buckets)]
+            inf = _format_labels(self.label_names, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help_text, labels, buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUESTS = registry.counter(
+    "chatbot_requests_total", "Messages processed by the agent", ["channel", "status"]
+)
+IN_FLIGHT = registry.gauge(
+    "chatbot_requests_in_flight", "Messages currently being processed", ["channel"]
+)
+STAGE_LATENCY = registry.histogram(
+    "chatbot_stage_duration_seconds", "Latency of each TourismAgent processing stage", ["channel", "stage"]
+)
+OUTBOUND_REQUESTS = registry.counter(
+    "chatbot_outbound_requests_total", "Outbound calls to external services", ["target", "status"]
+)
+OUTBOUND_LATENCY = registry.histogram(
+    "chatbot_outbound_duration_seconds", "Latency of outbound calls to external services", ["target"]
+)
+CIRCUIT_STATE = registry.gauge(
+    "chatbot_circuit_state", "Circuit breaker state per dependency (0 closed, 1 half-open, 2 open)", ["dependency"]
+)
+ADMISSION_REJECTED = registry.counter(
+    "chatbot_admission_rejected_total", "Messages refused by admission control", ["channel", "reason"]
+)
+HOTEL_HEDGES = registry.counter(
+    "chatbot_hotel_hedged_requests_total", "Hedged hotel provider requests sent after the p95 latency", ["provider"]
+)
+
+
+class track_request:
+    """Count a processed message, its in-flight time and total latency"""
+    __slots__ = ("channel", "start")
+
+    def __init__(self, channel: str):
+        self.channel = channel
+
+    def __enter__(self):
+        IN_FLIGHT.inc(self.channel)
+        self.start = time.perf_counter()
+
+    def __exit__(self, exc_type, exc, tb):
+        STAGE_LATENCY.observe(time.perf_counter() - self.start, self.channel, "total")
+        IN_FLIGHT.dec(self.channel)
+        REQUESTS.inc(self.channel, "error" if exc_type else "success")
+
+
+class track_stage:
+    """Time one TourismAgent stage (classify_intent, search_hotels, ...)"""
+    __slots__ = ("channel", "stage", "start")
+
+    def __init__(self, channel: str, stage: str):
+        self.channel = channel
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, exc_type, exc, tb):
+        STAGE_LATENCY.observe(time.perf_counter() - self.start, self.channel, self.stage)
+
+
+class track_outbound:
+    """Time an outbound call (makcorps, hf_inference, telegram, twilio)"""
+    __slots__ = ("target", "start")
+
+    def __init__(self, target: str):
+        self.target = target
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, exc_type, exc, tb):
+        OUTBOUND_LATENCY.observe(time.perf_counter() - self.start, self.target)
+        OUTBOUND_REQUESTS.inc(self.target, "error" if exc_type else "ok")
@@ -0,0 +1,47 @@
+from pydantic import BaseModel
+from typing import Optional, Dict, Any, List, Literal
+
+class ChatRequest(BaseModel):
+    """Single chat message from the web client"""
+    message: str
+    session_id: str = "default"
+
+class ChatResponse(BaseModel):
+    """Reply to a single chat message"""
+    response: str
+    session_id: str
+    status: str = "success"
+
+class FeedbackRequest(BaseModel):
+    """Thumbs up/down on one assistant reply"""
+    session_id: str = "default"
+    message: str
+    response: str
+    rating: Literal["up", "down"]
+    comment: Optional[str] = None
+    channel: str = "web"
+
+class FeedbackResponse(BaseModel):
+    """Acknowledgement of a buffered feedback record"""
+    id: str
+    status: str = "accepted"
+
+class BatchChatRequest(BaseModel):
+    """Many chat messages processed in one call"""
+    items: List[ChatRequest]
+    parallelism: Optional[int] = None
+
+class BatchItemResult(BaseModel):
+    """Outcome of one batch item, in input order"""
+    index: int
+    session_id: str
+    status: str
+    response: Optional[str] = None
+    hotels: List[Dict[str, Any]] = []
+    error: Optional[str] = None
+
+class BatchChatResponse(BaseModel):
+    """Results of a /chat/batch call"""
+    results: List[BatchItemResult]
+    succeeded: int
+    failed: int
@@ -0,0 +1,41 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+
+@dataclass(slots=True)
+class HotelRecord:
+    """Internal hotel search result
+
+    A plain slotted record: no validation and no per-hotel dict, so building
+    hundreds of them per search stays cheap. The public JSON shape is
+    produced only at the API boundary by ``to_dict``/``hotels_to_public``.
+    (Building the dict explicitly and dumping it with orjson is about 3x
+    faster than letting orjson walk a slotted dataclass.)
+    """
+    id: str
+    name: str
+    rating: float
+    price: Union[float, str]
+    location: str
+    url: str
+    currency: str = "EUR"
+    checkin: Optional[str] = None
+    checkout: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "rating": self.rating,
+            "price": self.price,
+            "location": self.location,
+            "url": self.url,
+            "currency": self.currency,
+            "checkin": self.checkin,
+            "checkout": self.checkout
+        }
+
+
+def hotels_to_public(hotels: Iterable[HotelRecord]) -> List[Dict[str, Any]]:
+    """Convert internal records to the JSON-ready public hotel schema"""
+    return [hotel.to_dict() for hotel in hotels]
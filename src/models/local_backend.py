@@ -0,0 +1,171 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingRequest:
+    __slots__ = ("prompt", "params", "future")
+
+    def __init__(self, prompt: str, params: Tuple[Tuple[str, Any], ...], future: Future):
+        self.prompt = prompt
+        self.params = params
+        self.future = future
+
+
+class LocalSeq2SeqBackend:
+    """In-process seq2seq backend with dynamic micro-batching
+
+    Exposes the same ``text_generation(prompt, max_new_tokens, temperature)``
+    call TourismAgent uses on InferenceClient. Concurrent callers are queued;
+    a single batching thread collects up to ``max_batch_size`` requests or
+    waits at most ``max_wait_ms`` for more, then runs them as one padded
+    ``generate`` call. Requests with different generation parameters are
+    batched separately.
+    """
+
+    def __init__(
+        self,
+        model,
+        tokenizer,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+        max_input_length: int = 512,
+        device: str = "cpu"
+    ):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_input_length = max_input_length
+        self.device = device
+        self._queue: "queue.Queue[Optional[_PendingRequest]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._loop, name="local-llm-batcher", daemon=True)
+        self._thread.start()
+        self.batches = 0
+        self.batched_requests = 0
+
+    @classmethod
+    def from_pretrained(
+        cls,
+        model_name: str,
+        device: int = -1,
+        precision: str = "fp32",
+        quantized_path: Optional[str] = None,
+        **kwargs
+    ) -> "LocalSeq2SeqBackend":
+        from transformers import AutoTokenizer
+        from src.models.quantization import load_seq2seq_model
+
+        if precision == "int8" and device >= 0:
+            raise ValueError("int8 dynamic quantization is only supported on CPU (device=-1)")
+        torch_device = "cpu" if device < 0 else f"cuda:{device}"
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = load_seq2seq_model(model_name, precision, quantized_path).to(torch_device)
+        logger.info(f"Loaded local model {model_name} ({precision}) on {torch_device}")
+        return cls(model, tokenizer, device=torch_device, **kwargs)
+
+    def text_generation(
+        self,
+        prompt: str,
+        max_new_tokens: int = 200,
+        temperature: Optional[float] = None,
+        **kwargs
+    ) -> str:
+        """Queue a prompt for the next batch and block until its text is ready"""
+        if kwargs.pop("stream", False):
+            raise NotImplementedError("LocalSeq2SeqBackend does not support streaming")
+        params: Dict[str, Any] = {"max_new_tokens": max_new_tokens, **kwargs}
+        if temperature is not None and temperature > 0:
+            params.update(do_sample=True, temperature=temperature)
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("LocalSeq2SeqBackend is closed")
+            self._queue.put(_PendingRequest(prompt, tuple(sorted(params.items())), future))
+        return future.result()
+
+    def _collect(self, first: _PendingRequest) -> List[_PendingRequest]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Put the shutdown marker back for the main loop
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _loop(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            groups: Dict[Tuple[Tuple[str, Any], ...], List[_PendingRequest]] = {}
+            for request in self._collect(first):
+                groups.setdefault(request.params, []).append(request)
+            for params, requests in groups.items():
+                self._run_batch(requests, dict(params))
+
+    def _run_batch(self, requests: List[_PendingRequest], params: Dict[str, Any]) -> None:
+        import torch
+
+        try:
+            inputs = self.tokenizer(
+                [r.prompt for r in requests],
+                return_tensors="pt",
+                padding=True,
+                truncation=True,
+                max_length=self.max_input_length
+            ).to(self.device)
+            with torch.inference_mode():
+                outputs = self.model.generate(**inputs, **params)
+            texts = self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+        except Exception as e:
+            logger.error(f"Local batch generation failed: {str(e)}")
+            for request in requests:
+                request.future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.batched_requests += len(requests)
+        for request, text in zip(requests, texts):
+            request.future.set_result(text)
+
+    def close(self) -> None:
+        """Stop the batching thread and fail whatever it can no longer serve
+
+        New calls are rejected at once. Requests already queued are still
+        served while the thread finishes (up to 5s); any left after that
+        fail instead of blocking their callers' threads forever.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join(timeout=5)
+        error = RuntimeError("LocalSeq2SeqBackend is closed")
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is not None:
+                request.future.set_exception(error)
+        if self._thread.is_alive():
+            # The drain may have taken the shutdown marker; the thread still needs one
+            self._queue.put(None)
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+PRECISIONS = ("fp32", "int8")
+
+
+def quantize_dynamic_int8(model):
+    """Apply int8 dynamic quantization to every nn.Linear of a CPU model"""
+    import torch
+
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def model_fingerprint(model_name: str, config) -> Optional[Dict[str, Any]]:
+    """What an int8 artifact was built from; None when the revision is unknown
+
+    Hub models are identified by the commit the config resolved to, local
+    directories by the names, sizes and mtimes of their files.
+    """
+    import torch
+    import transformers
+
+    revision = getattr(config, "_commit_hash", None)
+    if revision is None and os.path.isdir(model_name):
+        digest = hashlib.sha1()
+        for entry in sorted(os.scandir(model_name), key=lambda e: e.name):
+            if entry.is_file():
+                stat = entry.stat()
+                digest.update(f"{entry.name}\x00{stat.st_size}\x00{stat.st_mtime_ns}\n".encode("utf-8"))
+        revision = digest.hexdigest()
+    if revision is None:
+        return None
+    return {
+        "model": model_name,
+        "revision": revision,
+        "torch": torch.__version__,
+        "transformers": transformers.__version__
+    }
+
+
+def _meta_path(quantized_path: str) -> str:
+    return quantized_path + ".meta.json"
+
+
+def _artifact_matches(quantized_path: str, fingerprint: Optional[Dict[str, Any]]) -> bool:
+    if fingerprint is None or not os.path.exists(quantized_path):
+        return False
+    try:
+        with open(_meta_path(quantized_path), encoding="utf-8") as f:
+            return json.load(f) == fingerprint
+    except (OSError, ValueError):
+        return False
+
+
+def load_seq2seq_model(model_name: str, precision: str = "fp32", quantized_path: Optional[str] = None):
+    """Load a seq2seq model at the requested inference precision
+
+    For ``int8`` with ``quantized_path``: if the artifact exists and its
+    ``.meta.json`` fingerprint matches the current model revision, the model
+    is built from its config, quantized and filled from the saved state dict
+    (the fp32 weights are never loaded). Otherwise (first start, or the
+    model was updated since) the fp32 model is quantized and the artifact
+    rewritten for the next start.
+    """
+    import torch
+    from transformers import AutoConfig, AutoModelForSeq2SeqLM
+
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unsupported precision {precision!r}, expected one of {PRECISIONS}")
+
+    if precision == "fp32":
+        model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+        model.eval()
+        return model
+
+    config = AutoConfig.from_pretrained(model_name)
+    fingerprint = model_fingerprint(model_name, config) if quantized_path else None
+    if quantized_path and _artifact_matches(quantized_path, fingerprint):
+        model = AutoModelForSeq2SeqLM.from_config(config)
+        model.eval()
+        model = quantize_dynamic_int8(model)
+        model.load_state_dict(torch.load(quantized_path, map_location="cpu"))
+        logger.info(f"Loaded int8 model for {model_name} from {quantized_path}")
+        return model
+    if quantized_path and os.path.exists(quantized_path):
+        logger.info(f"Int8 artifact {quantized_path} is stale or unverified; re-quantizing {model_name}")
+
+    # Pin the weights to the commit the fingerprint describes
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_name, revision=getattr(config, "_commit_hash", None))
+    model.eval()
+    model = quantize_dynamic_int8(model)
+    logger.info(f"Quantized {model_name} to int8")
+    if quantized_path and fingerprint is not None:
+        os.makedirs(os.path.dirname(os.path.abspath(quantized_path)), exist_ok=True)
+        # Artifact first, fingerprint last: a crash in between leaves it unverified
+        if os.path.exists(_meta_path(quantized_path)):
+            os.remove(_meta_path(quantized_path))
+        torch.save(model.state_dict(), quantized_path + ".tmp")
+        os.replace(quantized_path + ".tmp", quantized_path)
+        with open(_meta_path(quantized_path), "w", encoding="utf-8") as f:
+            json.dump(fingerprint, f)
+        logger.info(f"Saved int8 model to {quantized_path}")
+    return model
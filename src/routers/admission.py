@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, nullcontext
+from typing import Any, AsyncContextManager, AsyncIterator, Dict, Optional, Tuple
+
+from src import metrics
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMITED_REPLY = "You're sending messages faster than I can answer. Please wait a moment and try again."
+OVERLOADED_REPLY = "I'm handling a lot of requests right now. Please try again in a minute."
+
+
+class AdmissionRejected(Exception):
+    """A message was refused by AdmissionController
+
+    ``reason`` is "rate_limited" (HTTP 429) or "overloaded" (HTTP 503);
+    ``reply`` is the canned text for chat channels. ``notify`` is False for
+    a sender who was already told about the rate limit since their bucket
+    last refilled; chat channels stay silent then.
+    """
+
+    def __init__(self, reason: str, retry_after: float, notify: bool = True):
+        super().__init__("Too many requests" if reason == "rate_limited" else "Server is overloaded")
+        self.reason = reason
+        self.retry_after = retry_after
+        self.notify = notify
+
+    @property
+    def status_code(self) -> int:
+        return 429 if self.reason == "rate_limited" else 503
+
+    @property
+    def reply(self) -> str:
+        return RATE_LIMITED_REPLY if self.reason == "rate_limited" else OVERLOADED_REPLY
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Retry-After": str(max(1, math.ceil(self.retry_after)))}
+
+
+class AdmissionController:
+    """Admission layer shared by the web, Telegram and WhatsApp entry points
+
+    ``admit(key, channel)`` applies a token bucket per sender (session_id,
+    chat_id or phone number): ``burst`` messages at once, refilled at
+    ``rate_per_minute``. ``acquire``/``release`` cap the number of LLM
+    generations in flight across all channels at ``max_in_flight``; up to
+    ``max_queue`` callers wait for a slot (at most ``queue_timeout``
+    seconds), beyond that new messages are shed at once.
+
+    Runs on the event loop only; buckets of the ``max_keys`` least recently
+    seen senders are kept.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: float = 20.0,
+        burst: int = 5,
+        max_in_flight: int = 32,
+        max_queue: int = 64,
+        queue_timeout: float = 10.0,
+        max_keys: int = 100_000
+    ):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_keys = max_keys
+        # key -> (tokens, last refill, sender already notified)
+        self._buckets: "OrderedDict[str, Tuple[float, float, bool]]" = OrderedDict()
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._in_flight = 0
+        self._waiting = 0
+        self.rejected = {"rate_limited": 0, "overloaded": 0}
+
+    @property
+    def overloaded(self) -> bool:
+        return self._in_flight >= self.max_in_flight and self._waiting >= self.max_queue
+
+    def _reject(self, reason: str, channel: str, retry_after: float, notify: bool = True) -> AdmissionRejected:
+        self.rejected[reason] += 1
+        metrics.ADMISSION_REJECTED.inc(channel, reason)
+        return AdmissionRejected(reason, retry_after, notify)
+
+    def admit(self, key: str, channel: str) -> None:
+        """Take one token from ``key``'s bucket; raises AdmissionRejected when empty or shedding"""
+        if self.overloaded:
+            raise self._reject("overloaded", channel, self.queue_timeout)
+        now = time.monotonic()
+        tokens, last, notified = self._buckets.pop(key, (float(self.burst), now, False))
+        tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+        if tokens < 1.0:
+            self._buckets[key] = (tokens, now, True)
+            raise self._reject("rate_limited", channel, (1.0 - tokens) / self.rate, notify=not notified)
+        self._buckets[key] = (tokens - 1.0, now, False)
+        if len(self._buckets) > self.max_keys:
+            # An evicted sender simply starts again with a full bucket
+            self._buckets.popitem(last=False)
+
+    async def acquire(self, channel: str) -> None:
+        """Wait for a generation slot; raises AdmissionRejected if the wait queue is full or times out"""
+        if self.overloaded:
+            raise self._reject("overloaded", channel, self.queue_timeout)
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise self._reject("overloaded", channel, self.queue_timeout)
+        finally:
+            self._waiting -= 1
+        self._in_flight += 1
+
+    def release(self) -> None:
+        self._in_flight -= 1
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def generation(self, channel: str) -> AsyncIterator[None]:
+        """Hold a generation slot for the duration of the block"""
+        await self.acquire(channel)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self._in_flight,
+            "max_in_flight": self.max_in_flight,
+            "waiting": self._waiting,
+            "max_queue": self.max_queue,
+            "tracked_senders": len(self._buckets),
+            "rejected": dict(self.rejected)
+        }
+
+
+def generation_slot(admission: Optional[AdmissionController], channel: str) -> AsyncContextManager:
+    """``admission.generation(channel)``, or a no-op when admission control is off"""
+    return admission.generation(channel) if admission is not None else nullcontext()
@@ -0,0 +1,71 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookDedupe:
+    """Bounded TTL index of webhook deliveries, keyed on the provider's message id
+
+    Telegram (``update_id``) and Twilio (``MessageSid``) redeliver a webhook
+    when the first delivery timed out. ``begin`` registers a delivery and
+    returns None for a new id; for a redelivery it returns the future of
+    the original, which resolves to the stored result once that finishes.
+    A failed delivery is forgotten, so the provider's retry runs again.
+
+    Entries expire ``ttl`` seconds after they were registered; at most
+    ``max_entries`` ids are kept (oldest evicted first). Runs on the event
+    loop only.
+    """
+
+    def __init__(self, name: str, ttl: float = 600.0, max_entries: int = 10_000):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, asyncio.Future]]" = OrderedDict()
+        self.duplicates = 0
+
+    def _expire(self, now: float) -> None:
+        while self._entries:
+            key, (expires_at, _) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_entries:
+                return
+            del self._entries[key]
+
+    def begin(self, key: str) -> Optional[asyncio.Future]:
+        """Register delivery ``key``; returns the original's future if it was seen before"""
+        now = time.monotonic()
+        self._expire(now)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.duplicates += 1
+            logger.info(f"Duplicate {self.name} delivery {key}")
+            return entry[1]
+        future = asyncio.get_running_loop().create_future()
+        # Nobody may await it; keep a failure from being reported as unretrieved
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._entries[key] = (now + self.ttl, future)
+        self._expire(now)
+        return None
+
+    def finish(self, key: str, result: Any = None) -> None:
+        """Store the result of delivery ``key`` for later redeliveries"""
+        entry = self._entries.get(key)
+        if entry is not None and not entry[1].done():
+            entry[1].set_result(result)
+
+    def fail(self, key: str) -> None:
+        """Forget delivery ``key`` so a redelivery is processed again"""
+        entry = self._entries.pop(key, None)
+        if entry is not None and not entry[1].done():
+            entry[1].set_exception(RuntimeError(f"{self.name} delivery {key} failed"))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "duplicates": self.duplicates
+        }
@@ -1,44 +1,117 @@
 from fastapi import APIRouter, Request, HTTPException
-import requests
 import os
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from src.tools import http_pool
+from src.routers.work_queue import WorkQueue
+from src.routers.admission import AdmissionRejected, generation_slot
+from src import metrics
+
+TELEGRAM_API_URL = "https://api.telegram.org"
 
 logger = logging.getLogger(__name__)
 
-def create_telegram_router(agent):
+async def send_telegram_message(chat_id: Any, text: str) -> None:
+    """Deliver a reply through the Bot API sendMessage method"""
+    with metrics.track_outbound("telegram"):
+        client = http_pool.get_async_client(TELEGRAM_API_URL)
+        telegram_response = await client.post(
+            f"{TELEGRAM_API_URL}/bot{os.getenv('TELEGRAM_TOKEN')}/sendMessage",
+            json={"chat_id": chat_id, "text": text}
+        )
+        telegram_response.raise_for_status()
+
+def create_telegram_router(agent, queue_size: int = 100, concurrency: int = 4, admission=None, dedupe=None):
+    queue = WorkQueue("telegram", max_size=queue_size, concurrency=concurrency)
     router = APIRouter(
         prefix="/telegram",
         tags=["telegram"],
-        responses={404: {"description": "Not found"}}
+        responses={404: {"description": "Not found"}},
+        on_startup=[queue.start],
+        on_shutdown=[queue.stop]
     )
 
-    @router.post("/webhook", response_model=Dict[str, Any])
-    async def telegram_webhook(request: Request):
-        """Handle incoming Telegram webhook requests"""
+    async def send_followup(chat_id: Any, followup) -> None:
+        """Generate the deferred hotel summary and send it as a second message"""
         try:
-            data = await request.json()
-            message = data.get("message", {}).get("text", "")
-            chat_id = data.get("message", {}).get("chat", {}).get("id")
+            # Deferred summaries count against the global generation cap too
+            async with generation_slot(admission, "telegram"):
+                summary = await followup()
+            if summary:
+                await send_telegram_message(chat_id, summary)
+        except Exception as e:
+            logger.error(f"Telegram follow-up error for chat {chat_id}: {str(e)}")
+
+    async def send_canned_reply(chat_id: Any, text: str) -> None:
+        try:
+            await send_telegram_message(chat_id, text)
+        except Exception as e:
+            logger.error(f"Telegram error for chat {chat_id}: {str(e)}")
 
-            if not message or not chat_id:
-                return {"status": "error", "detail": "Invalid payload"}
+    async def generate(chat_id: Any, message: str) -> dict:
+        async with generation_slot(admission, "telegram"):
+            return await agent.aprocess_message(message, session_id=f"telegram:{chat_id}", channel="telegram")
 
-            # Use shared agent
-            result = agent.process_message(message)
-            reply = result["response"]
+    async def handle_update(chat_id: Any, message: str) -> None:
+        """Run the agent and send the reply; executed by a queue worker"""
+        try:
+            result = await generate(chat_id, message)
+            await send_telegram_message(chat_id, result["response"])
+        except AdmissionRejected as e:
+            await send_canned_reply(chat_id, e.reply)
+            return
+        except Exception as e:
+            logger.error(f"Telegram error for chat {chat_id}: {str(e)}")
+            return
+        # Queued behind other chats' first replies rather than holding this worker
+        if result.get("followup") and not queue.submit(send_followup, chat_id, result["followup"]):
+            logger.warning(f"Dropped hotel summary for chat {chat_id}: queue full")
 
-            # Send to Telegram
-            telegram_response = requests.post(
-                f"https://api.telegram.org/bot{os.getenv('TELEGRAM_TOKEN')}/sendMessage",
-                json={"chat_id": chat_id, "text": reply}
-            )
-            telegram_response.raise_for_status()
+    def accept_update(chat_id: Any, message: str) -> Optional[Dict[str, Any]]:
+        """Admit and enqueue an update; None when the queue is full"""
+        if admission is not None:
+            try:
+                admission.admit(f"telegram:{chat_id}", "telegram")
+            except AdmissionRejected as e:
+                # Acked with 200 so Telegram does not redeliver; the user gets one
+                # short notice per rate-limit window, not one per flooded message
+                if e.notify:
+                    queue.submit(send_canned_reply, chat_id, e.reply)
+                return {"status": e.reason}
 
-            return {"status": "success", "response": reply}
+        if not queue.submit(handle_update, chat_id, message):
+            return None
+        return {"status": "queued"}
 
+    @router.post("/webhook", response_model=Dict[str, Any])
+    async def telegram_webhook(request: Request):
+        """Validate and enqueue incoming Telegram updates, then ack at once"""
+        try:
+            data = await request.json()
         except Exception as e:
             logger.error(f"Telegram error: {str(e)}")
-            raise HTTPException(status_code=500, detail=str(e))
+            raise HTTPException(status_code=400, detail="Invalid JSON")
+
+        message = data.get("message", {}).get("text", "")
+        chat_id = data.get("message", {}).get("chat", {}).get("id")
+
+        if not message or not chat_id:
+            return {"status": "error", "detail": "Invalid payload"}
+
+        update_id = data.get("update_id")
+        track = dedupe is not None and update_id is not None
+        if track and dedupe.begin(str(update_id)) is not None:
+            # Redelivered update: already queued or answered, ack without reprocessing
+            return {"status": "duplicate"}
+        result = accept_update(chat_id, message)
+        if track:
+            if result is None:
+                dedupe.fail(str(update_id))
+            else:
+                dedupe.finish(str(update_id), result)
+        if result is None:
+            # Non-2xx makes Telegram redeliver later instead of dropping the update
+            raise HTTPException(status_code=503, detail="Telegram queue is full")
+        return result
 
-    return router
\ No newline at end of file
+    return router
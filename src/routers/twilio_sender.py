@@ -0,0 +1,37 @@
+import asyncio
+import logging
+from typing import Dict, List
+from src import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class TwilioSender:
+    """Deliver WhatsApp replies through the Twilio Messages REST API"""
+
+    def __init__(self, account_sid: str, auth_token: str, from_number: str):
+        from twilio.rest import Client
+        self.client = Client(account_sid, auth_token)
+        self.from_number = from_number
+
+    async def send(self, to: str, body: str) -> None:
+        # The Twilio SDK is blocking, keep it off the event loop
+        with metrics.track_outbound("twilio"):
+            message = await asyncio.to_thread(
+                self.client.messages.create,
+                from_=self.from_number,
+                to=to,
+                body=body
+            )
+        logger.info(f"Sent WhatsApp reply {message.sid} to {to}")
+
+
+class FakeSender:
+    """In-memory sender for local runs and tests; records every message"""
+
+    def __init__(self):
+        self.sent: List[Dict[str, str]] = []
+
+    async def send(self, to: str, body: str) -> None:
+        self.sent.append({"to": to, "body": body})
+        logger.info(f"[fake] WhatsApp reply to {to}: {body}")
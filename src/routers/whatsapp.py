@@ -1,43 +1,144 @@
 from fastapi import APIRouter, Form, Response
-from twilio.twiml.messaging_response import MessagingResponse
+import asyncio
 import logging
+from typing import Optional
+from src.routers.work_queue import WorkQueue
+from src.routers.admission import AdmissionRejected, generation_slot
 
 logger = logging.getLogger(__name__)
 
-def create_whatsapp_router(agent):
+FALLBACK_REPLY = "⚠️ Sorry, I'm having trouble. Please try again later."
+
+def twiml_response(resp, status_code: int = 200) -> Response:
+    return Response(
+        content=str(resp),
+        media_type="application/xml",
+        headers={"Content-Type": "application/xml; charset=utf-8"},
+        status_code=status_code
+    )
+
+def create_whatsapp_router(
+    agent,
+    async_replies: bool = False,
+    sender=None,
+    queue_size: int = 100,
+    concurrency: int = 4,
+    admission=None,
+    dedupe=None
+):
+    """Build the WhatsApp router
+
+    With ``async_replies`` the webhook acks with empty TwiML and the reply is
+    generated by a background worker and delivered through ``sender`` (a
+    TwilioSender, or FakeSender for local runs). Deferred hotel summaries
+    (template mode) are sent as a second message; inline TwiML replies
+    carry the hotel list only.
+
+    With an ``admission`` controller, senders over their rate limit and
+    messages shed under load get a short canned TwiML reply. With a
+    ``dedupe`` index, a Twilio redelivery (same MessageSid) gets the reply
+    of the original delivery without calling the agent again.
+    """
+    # Imported here so twilio is only loaded when WhatsApp is enabled
+    from twilio.twiml.messaging_response import MessagingResponse
+
+    if async_replies and sender is None:
+        raise ValueError("async_replies requires a sender")
+
+    queue = WorkQueue("whatsapp", max_size=queue_size, concurrency=concurrency)
     router = APIRouter(
         prefix="/whatsapp",
-        tags=["whatsapp"]
+        tags=["whatsapp"],
+        on_startup=[queue.start] if async_replies else [],
+        on_shutdown=[queue.stop] if async_replies else []
     )
 
+    async def send_followup(to: str, followup) -> None:
+        try:
+            # Deferred summaries count against the global generation cap too
+            async with generation_slot(admission, "whatsapp"):
+                summary = await followup()
+        except Exception as e:
+            logger.error(f"WhatsApp follow-up error: {str(e)}")
+            return
+        if summary:
+            await sender.send(to, summary)
+
+    async def generate(body: str, sender_id: str) -> dict:
+        # Twilio's From is already namespaced ("whatsapp:+15550001")
+        async with generation_slot(admission, "whatsapp"):
+            return await agent.aprocess_message(body, session_id=sender_id, channel="whatsapp")
+
+    def message_response(text: Optional[str]) -> Response:
+        """TwiML carrying ``text``, or an empty ack when None"""
+        resp = MessagingResponse()
+        if text is not None:
+            resp.message(text)
+        return twiml_response(resp)
+
+    async def reply_in_background(to: str, body: str) -> None:
+        followup = None
+        try:
+            result = await generate(body, to)
+            reply = result["response"]
+            followup = result.get("followup")
+        except AdmissionRejected as e:
+            reply = e.reply
+        except Exception as e:
+            logger.error(f"WhatsApp background reply error: {str(e)}")
+            reply = FALLBACK_REPLY
+        await sender.send(to, reply)
+        if followup and not queue.submit(send_followup, to, followup):
+            logger.warning(f"Dropped hotel summary for {to}: queue full")
+
+    async def handle_message(From: str, Body: str) -> Optional[str]:
+        """Reply text for the webhook response, or None when it is sent in the background"""
+        if admission is not None:
+            try:
+                admission.admit(From, "whatsapp")
+            except AdmissionRejected as e:
+                # One notice per rate-limit window; later messages get an empty ack
+                return e.reply if e.notify else None
+
+        if async_replies:
+            if not queue.submit(reply_in_background, From, Body):
+                return FALLBACK_REPLY
+            # Empty TwiML: Twilio gets its ack, the reply follows via REST
+            return None
+
+        # Use shared agent
+        try:
+            result = await generate(Body, From)
+        except AdmissionRejected as e:
+            return e.reply
+        return result["response"]
+
     @router.post("/webhook")
     async def whatsapp_webhook(
         From: str = Form(...),
-        Body: str = Form(...)
+        Body: str = Form(...),
+        MessageSid: Optional[str] = Form(None)
     ):
+        logger.info(f"Received WhatsApp message from {From}: {Body}")
+        track = dedupe is not None and bool(MessageSid)
+        original = dedupe.begin(MessageSid) if track else None
         try:
-            logger.info(f"Received WhatsApp message from {From}: {Body}")
-
-            # Use shared agent
-            result = agent.process_message(Body)
-            reply = result["response"]
-
-            # TwiML response
-            resp = MessagingResponse()
-            resp.message(reply)
-            return Response(
-                content=str(resp),
-                media_type="application/xml",
-                headers={"Content-Type": "application/xml; charset=utf-8"}
-            )
-        except Exception as e:
+            if original is not None:
+                # Twilio redelivery: answer with the original reply instead of running the agent again
+                reply = await asyncio.shield(original)
+            else:
+                reply = await handle_message(From, Body)
+                if track:
+                    dedupe.finish(MessageSid, reply)
+            return message_response(reply)
+        except BaseException as e:
+            if track and original is None:
+                dedupe.fail(MessageSid)
+            if not isinstance(e, Exception):
+                raise
             logger.error(f"WhatsApp webhook error: {str(e)}")
             fallback = MessagingResponse()
-            fallback.message("⚠️ Sorry, I'm having trouble. Please try again later.")
-            return Response(
-                content=str(fallback),
-                media_type="application/xml",
-                status_code=500
-            )
-
-    return router
\ No newline at end of file
+            fallback.message(FALLBACK_REPLY)
+            return twiml_response(fallback, status_code=500)
+
+    return router
@@ -0,0 +1,73 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class WorkQueue:
+    """Bounded asyncio queue drained by a fixed pool of background workers
+
+    Webhook handlers ``submit`` a job and return right away; the workers run
+    the job (agent call plus reply delivery) outside the request. ``stop``
+    stops accepting work and waits for queued jobs to finish.
+    """
+
+    def __init__(self, name: str, max_size: int = 100, concurrency: int = 4):
+        self.name = name
+        self.max_size = max_size
+        self.concurrency = concurrency
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._accepting = False
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self) -> None:
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"{self.name}-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        self._accepting = True
+        logger.info(f"{self.name} queue started with {self.concurrency} workers (depth {self.max_size})")
+
+    def submit(self, job: Callable[..., Awaitable[Any]], *args: Any) -> bool:
+        """Enqueue ``job(*args)``; returns False when the queue is full or stopped"""
+        if not self._accepting or self._queue is None:
+            return False
+        try:
+            self._queue.put_nowait((job, args))
+            return True
+        except asyncio.QueueFull:
+            logger.warning(f"{self.name} queue full ({self.max_size}), rejecting job")
+            return False
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job, args = await self._queue.get()
+            try:
+                await job(*args)
+            except Exception as e:
+                logger.error(f"{self.name} worker {index} job failed: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def stop(self, drain_timeout: float = 30.0) -> None:
+        """Stop accepting jobs, drain the queue, then cancel the workers"""
+        if not self._workers:
+            return
+        self._accepting = False
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{self.name} queue drain timed out with {self.depth} jobs left")
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info(f"{self.name} queue stopped")
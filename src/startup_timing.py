@@ -0,0 +1,43 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Record how long each import/initialization stage of the app takes"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.stages: List[Tuple[str, float]] = []
+        self.ready_at = None
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - start))
+
+    def mark_ready(self) -> None:
+        self.ready_at = time.perf_counter()
+
+    def report(self) -> Dict[str, Any]:
+        end = self.ready_at or time.perf_counter()
+        return {
+            "total_ms": round((end - self.started_at) * 1000, 1),
+            "ready": self.ready_at is not None,
+            "stages_ms": {name: round(seconds * 1000, 1) for name, seconds in self.stages}
+        }
+
+    def log_report(self) -> None:
+        report = self.report()
+        breakdown = ", ".join(f"{name}={ms}ms" for name, ms in report["stages_ms"].items())
+        logger.info(f"Startup took {report['total_ms']}ms ({breakdown})")
+
+
+# Created on first import, so import app.py's dependencies after this module
+startup_timer = StartupTimer()
@@ -1,17 +1,35 @@
+import asyncio
 import requests
-from typing import Dict, Any, List, Optional
+import httpx
+from typing import Callable, Dict, Any, List, Optional
 from datetime import datetime, timedelta
 import os
 import logging
+import time
 from dotenv import load_dotenv
 import json
+from .hotel_cache import HotelSearchCache, hotel_search_cache
+from . import http_pool
+from .gazetteer import Gazetteer, load_default_gazetteer
+from src import metrics
+from src.models.hotel_record import HotelRecord
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, get_breaker
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 class BookingAPIClient:
-    def __init__(self):
+    def __init__(
+        self,
+        cache: Optional[HotelSearchCache] = None,
+        gazetteer: Optional[Gazetteer] = None,
+        breaker: Optional[CircuitBreaker] = None
+    ):
         load_dotenv()
+        self.cache = cache if cache is not None else hotel_search_cache
+        # Shared with the LangChain tool: both talk to the same MakCorps API
+        self.breaker = breaker or get_breaker("makcorps")
+        self.gazetteer = gazetteer or load_default_gazetteer()
         self.base_url = "https://api.makcorps.com/city"
         self.api_key = os.getenv("MAKCORPS_API_KEY")
         self.use_simulation = os.getenv("USE_SIMULATION", "false").lower() == "true"
@@ -31,27 +49,36 @@ class BookingAPIClient:
         if self.use_simulation:
             return self._get_simulated_data(location, checkin_date)
         
-        # Extract city ID from location string
-        city_id = self._extract_city_id(location)
         checkout = checkout_date or self._calculate_checkout(checkin_date)
-        
-        params = {
-            "api_key": self.api_key,
-            "cityid": city_id,
-            "checkin": checkin_date,
-            "checkout": checkout,
-            "adults": guest_count
-        }
-        
         try:
-            response = requests.get(
-                self.base_url,
-                params=params,
-                timeout=15
-            )
-            response.raise_for_status()
-            return self._format_response(response.json(), location, checkin_date, checkout)
-        except requests.exceptions.RequestException as e:
+            hotels = self.fetch_hotels(location, checkin_date, checkout, guest_count)
+            return self._response(hotels, location, checkin_date, checkout)
+        except (requests.exceptions.RequestException, CircuitOpenError) as e:
+            logger.error(f"API request failed: {e}")
+            return self._get_simulated_data(location, checkin_date)
+        except (ValueError, KeyError) as e:
+            logger.error(f"Response parsing failed: {e}")
+            return {
+                "status": "error",
+                "message": "Failed to parse hotel data"
+            }
+
+    async def asearch_hotels(
+        self,
+        location: str,
+        checkin_date: str,
+        checkout_date: Optional[str] = None,
+        guest_count: int = 2
+    ) -> Dict[str, Any]:
+        """Non-blocking variant of search_hotels for async request handlers"""
+        if self.use_simulation:
+            return self._get_simulated_data(location, checkin_date)
+
+        checkout = checkout_date or self._calculate_checkout(checkin_date)
+        try:
+            hotels = await self.afetch_hotels(location, checkin_date, checkout, guest_count)
+            return self._response(hotels, location, checkin_date, checkout)
+        except (httpx.HTTPError, asyncio.TimeoutError, CircuitOpenError) as e:
             logger.error(f"API request failed: {e}")
             return self._get_simulated_data(location, checkin_date)
         except (ValueError, KeyError) as e:
@@ -61,10 +88,95 @@ class BookingAPIClient:
                 "message": "Failed to parse hotel data"
             }
 
+    def fetch_hotels(
+        self,
+        location: str,
+        checkin: str,
+        checkout: str,
+        guest_count: int = 2
+    ) -> List[HotelRecord]:
+        """Query MakCorps through the shared cache; raises on request or parse errors"""
+        params = self._build_params(location, checkin, checkout, guest_count)
+        key = self.cache.make_key(params["cityid"], checkin, checkout, guest_count)
+
+        def request(timeout: float):
+            with metrics.track_outbound("makcorps"):
+                response = http_pool.get_session(self.base_url).get(
+                    self.base_url,
+                    params=params,
+                    timeout=http_pool.request_timeout(timeout)
+                )
+                if response.status_code >= 500:
+                    response.raise_for_status()
+                return response
+
+        def fetch():
+            response = self.breaker.call(request)
+            # 4xx means a bad query, not a failing dependency: raise outside the breaker
+            response.raise_for_status()
+            return response.json()
+
+        return self._parse_hotels(self.cache.get_or_fetch(key, fetch), location, checkin, checkout)
+
+    async def afetch_hotels(
+        self,
+        location: str,
+        checkin: str,
+        checkout: str,
+        guest_count: int = 2,
+        bypass_cache: bool = False,
+        observe_latency: Optional[Callable[[float], None]] = None
+    ) -> List[HotelRecord]:
+        """Async fetch_hotels; ``bypass_cache`` sends a fresh request (used for hedging)
+
+        ``observe_latency`` is called with the duration of each successful
+        upstream request only, never for answers served from the cache.
+        """
+        params = self._build_params(location, checkin, checkout, guest_count)
+        key = self.cache.make_key(params["cityid"], checkin, checkout, guest_count)
+
+        async def request(timeout: float):
+            start = time.perf_counter()
+            with metrics.track_outbound("makcorps"):
+                client = http_pool.get_async_client(self.base_url)
+                response = await client.get(
+                    self.base_url,
+                    params=params,
+                    timeout=http_pool.async_timeout(timeout)
+                )
+                if response.status_code >= 500:
+                    response.raise_for_status()
+            if observe_latency is not None:
+                observe_latency(time.perf_counter() - start)
+            return response
+
+        async def fetch():
+            response = await self.breaker.acall(request)
+            response.raise_for_status()
+            return response.json()
+
+        data = await fetch() if bypass_cache else await self.cache.aget_or_fetch(key, fetch)
+        return self._parse_hotels(data, location, checkin, checkout)
+
+    def _build_params(self, location: str, checkin: str, checkout: str, guest_count: int) -> Dict[str, Any]:
+        """Build MakCorps query parameters"""
+        # Extract city ID from location string
+        return {
+            "api_key": self.api_key,
+            "cityid": self._extract_city_id(location),
+            "checkin": checkin,
+            "checkout": checkout,
+            "adults": guest_count
+        }
+
     def _extract_city_id(self, location: str) -> str:
         """Extract city ID from location string if available"""
         if "(" in location and ")" in location:
             return location.split("(")[-1].split(")")[0].strip()
+        if self.gazetteer is not None:
+            city = self.gazetteer.lookup(location) or self.gazetteer.find_in_text(location)
+            if city is not None:
+                return city.city_id
         return location
 
     def _calculate_checkout(self, checkin_date: str) -> str:
@@ -77,59 +189,73 @@ class BookingAPIClient:
         checkout_date = self._calculate_checkout(checkin_date)
         return {
             "status": "success",
-            "hotels": [
-                {
-                    "id": "sim_001",
-                    "name": f"Luxury Hotel in {location}",
-                    "rating": 4.8,
-                    "price": 250,
-                    "currency": "EUR",
-                    "location": location,
-                    "checkin": checkin_date,
-                    "checkout": checkout_date,
-                    "url": "https://example.com/hotel1"
-                },
-                {
-                    "id": "sim_002",
-                    "name": f"Boutique Hotel in {location}",
-                    "rating": 4.5,
-                    "price": 180,
-                    "currency": "EUR",
-                    "location": location,
-                    "checkin": checkin_date,
-                    "checkout": checkout_date,
-                    "url": "https://example.com/hotel2"
-                }
-            ]
+            "hotels": simulated_hotels(location, checkin_date, checkout_date)
         }
-    
+
     def _format_response(self, data: List[Dict[str, Any]], 
                         location: str, 
                         checkin: str, 
                         checkout: str) -> Dict[str, Any]:
         """Standardize API response format"""
-        hotels = []
-        for hotel in data:
-            # Skip invalid entries
-            if not isinstance(hotel, dict):
-                continue
-                
-            hotels.append({
-                "id": hotel.get("id", ""),
-                "name": hotel.get("name", "Unknown Hotel"),
-                "rating": hotel.get("rating", hotel.get("reviews", {}).get("rating", 0)),
-                "price": hotel.get("price", 0),
-                "currency": hotel.get("currency", "EUR"),
-                "location": location,
-                "checkin": checkin,
-                "checkout": checkout,
-                "url": hotel.get("url", "")
-            })
-        
+        return self._response(self._parse_hotels(data, location, checkin, checkout), location, checkin, checkout)
+
+    def _response(self, hotels: List[HotelRecord], location: str, checkin: str, checkout: str) -> Dict[str, Any]:
         return {
             "status": "success",
             "location": location,
             "checkin": checkin,
             "checkout": checkout,
             "hotels": hotels
-        }
\ No newline at end of file
+        }
+
+    def _parse_hotels(self, data: List[Dict[str, Any]],
+                      location: str,
+                      checkin: str,
+                      checkout: str) -> List[HotelRecord]:
+        hotels = []
+        for hotel in data:
+            # Skip invalid entries
+            if not isinstance(hotel, dict):
+                continue
+
+            rating = hotel.get("rating")
+            if rating is None:
+                rating = (hotel.get("reviews") or {}).get("rating", 0)
+            hotels.append(HotelRecord(
+                id=hotel.get("id", ""),
+                name=hotel.get("name", "Unknown Hotel"),
+                rating=rating,
+                price=hotel.get("price", 0),
+                location=location,
+                url=hotel.get("url", ""),
+                currency=hotel.get("currency", "EUR"),
+                checkin=checkin,
+                checkout=checkout
+            ))
+        return hotels
+
+
+def simulated_hotels(location: str, checkin: str, checkout: str) -> List[HotelRecord]:
+    """Deterministic placeholder hotels for simulation mode and fallbacks"""
+    return [
+        HotelRecord(
+            id="sim_001",
+            name=f"Luxury Hotel in {location}",
+            rating=4.8,
+            price=250,
+            location=location,
+            url="https://example.com/hotel1",
+            checkin=checkin,
+            checkout=checkout
+        ),
+        HotelRecord(
+            id="sim_002",
+            name=f"Boutique Hotel in {location}",
+            rating=4.5,
+            price=180,
+            location=location,
+            url="https://example.com/hotel2",
+            checkin=checkin,
+            checkout=checkout
+        )
+    ]
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict
+
+from src import metrics
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open"""
+
+    def __init__(self, name: str):
+        super().__init__(f"Circuit for {name} is open")
+        self.name = name
+
+
+class CircuitBreaker:
+    """Per-dependency circuit breaker with a latency-derived timeout
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls fail immediately with CircuitOpenError. After ``reset_timeout``
+    seconds one probe call is let through (half-open): success closes the
+    circuit, failure opens it again.
+
+    ``timeout()`` is the observed ``timeout_quantile`` latency of recent
+    successful calls times ``timeout_multiplier``, clamped to
+    [``min_timeout``, ``max_timeout``]; ``max_timeout`` is used until
+    ``min_samples`` calls were seen.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        max_timeout: float = 15.0,
+        min_timeout: float = 1.0,
+        timeout_quantile: float = 0.99,
+        timeout_multiplier: float = 2.0,
+        min_samples: int = 20,
+        window: int = 200
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_timeout = max_timeout
+        self.min_timeout = min_timeout
+        self.timeout_quantile = timeout_quantile
+        self.timeout_multiplier = timeout_multiplier
+        self.min_samples = min_samples
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._timeout = max_timeout
+        self.opened = 0
+        self.rejected = 0
+        metrics.CIRCUIT_STATE.set(name, value=0)
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def timeout(self) -> float:
+        return self._timeout
+
+    def allow(self) -> bool:
+        """Whether a call may go through now; reserves the probe when half-open"""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._set_state(HALF_OPEN)
+            if self._state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self, latency: float) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+            self._failures = 0
+            self._probing = False
+            if self._state != CLOSED:
+                self._set_state(CLOSED)
+                logger.info(f"Circuit for {self.name} closed")
+            if len(self._latencies) >= self.min_samples:
+                ordered = sorted(self._latencies)
+                observed = ordered[min(len(ordered) - 1, int(self.timeout_quantile * len(ordered)))]
+                self._timeout = min(self.max_timeout, max(self.min_timeout, observed * self.timeout_multiplier))
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == HALF_OPEN or (self._state == CLOSED and self._failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+                self.opened += 1
+                self._set_state(OPEN)
+                logger.warning(f"Circuit for {self.name} opened after {self._failures} failures")
+
+    def release(self) -> None:
+        """Give back a reserved probe without an outcome (e.g. the caller went away)"""
+        with self._lock:
+            self._probing = False
+
+    def _set_state(self, state: str) -> None:
+        self._state = state
+        metrics.CIRCUIT_STATE.set(self.name, value=_STATE_VALUES[state])
+
+    def call(self, fn: Callable[[float], Any]) -> Any:
+        """Run ``fn(timeout)`` through the breaker"""
+        if not self.allow():
+            raise CircuitOpenError(self.name)
+        start = time.perf_counter()
+        try:
+            result = fn(self._timeout)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success(time.perf_counter() - start)
+        return result
+
+    async def acall(self, fn: Callable[[float], Awaitable[Any]]) -> Any:
+        """Await ``fn(timeout)`` through the breaker, cancelling it at the timeout"""
+        if not self.allow():
+            raise CircuitOpenError(self.name)
+        timeout = self._timeout
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(fn(timeout), timeout)
+        except asyncio.CancelledError:
+            # The caller went away; says nothing about the dependency
+            self.release()
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success(time.perf_counter() - start)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self._state,
+            "consecutive_failures": self._failures,
+            "timeout_seconds": round(self._timeout, 3),
+            "samples": len(self._latencies),
+            "opened": self.opened,
+            "rejected": self.rejected
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(name: str, max_timeout: float = 15.0) -> CircuitBreaker:
+    """Shared breaker for dependency ``name``, configured from CIRCUIT_* env vars"""
+    breaker = _breakers.get(name)
+    if breaker is not None:
+        return breaker
+    with _registry_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(
+                name,
+                failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")),
+                reset_timeout=float(os.getenv("CIRCUIT_RESET_SECONDS", "30")),
+                max_timeout=max_timeout,
+                min_timeout=float(os.getenv("CIRCUIT_MIN_TIMEOUT_SECONDS", "1")),
+                timeout_quantile=float(os.getenv("CIRCUIT_TIMEOUT_QUANTILE", "0.99")),
+                timeout_multiplier=float(os.getenv("CIRCUIT_TIMEOUT_MULTIPLIER", "2"))
+            )
+        return breaker
+
+
+def breaker_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: breaker.stats() for name, breaker in _breakers.items()}
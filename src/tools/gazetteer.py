@@ -0,0 +1,230 @@
+import csv
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+import unicodedata
+import zlib
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_CSV = os.path.join(_ROOT, "data", "gazetteer.csv")
+DEFAULT_INDEX = os.path.join(_ROOT, "data", "gazetteer.idx")
+
+# Index layout: MAGIC | uint32 count | uint32 max_words | uint32 filter_bytes |
+# first-word filter bitmap | uint32 offsets[count] | records
+# Each record is b"<key>\x1f<city_id>\x1f<name>\n", sorted by key bytes.
+# The bitmap has one bit set per (crc32 of the) first word of every key, so
+# most words of a message are rejected without touching the sorted index.
+MAGIC = b"GZT2"
+_HEADER = struct.Struct("<4sIII")
+_OFFSET = struct.Struct("<I")
+_SEP = b"\x1f"
+
+_TOKEN = re.compile(r"\w+")
+
+
+class City(NamedTuple):
+    name: str
+    city_id: str
+
+
+def normalize(text: str) -> str:
+    """Casefold, strip accents and collapse to space-separated word tokens"""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(_TOKEN.findall(stripped))
+
+
+def build_index(rows: Iterable[Tuple[str, Iterable[str], str]]) -> bytes:
+    """Serialize (name, aliases, city_id) rows into the sorted index format"""
+    records = {}
+    for name, aliases, city_id in rows:
+        for label in [name, *aliases]:
+            key = normalize(label)
+            if key:
+                records[key.encode("utf-8")] = (str(city_id).encode("utf-8"), name.encode("utf-8"))
+
+    keys = sorted(records)
+    max_words = max((k.count(b" ") + 1 for k in keys), default=1)
+    filter_bytes = max(64, 2 * len(keys))  # 16 bits per key
+    bitmap = bytearray(filter_bytes)
+    for key in keys:
+        bit = zlib.crc32(key.split(b" ", 1)[0]) % (filter_bytes * 8)
+        bitmap[bit >> 3] |= 1 << (bit & 7)
+    header_size = _HEADER.size + filter_bytes + _OFFSET.size * len(keys)
+    offsets, body = [], bytearray()
+    for key in keys:
+        city_id, name = records[key]
+        offsets.append(header_size + len(body))
+        body += key + _SEP + city_id + _SEP + name + b"\n"
+
+    out = bytearray(_HEADER.pack(MAGIC, len(keys), max_words, filter_bytes))
+    out += bitmap
+    for offset in offsets:
+        out += _OFFSET.pack(offset)
+    return bytes(out + body)
+
+
+def read_csv(path: str) -> List[Tuple[str, List[str], str]]:
+    """Read name,aliases,city_id rows; aliases are separated by '|'"""
+    with open(path, newline="", encoding="utf-8") as f:
+        return [
+            (row["name"], [a for a in (row.get("aliases") or "").split("|") if a], row["city_id"])
+            for row in csv.DictReader(f)
+        ]
+
+
+class Gazetteer:
+    """Memory-mapped, sorted prefix index of city names and aliases
+
+    Lookups binary-search the offset table directly in the mapped file, so
+    opening is O(1) and nothing is parsed into Python objects up front.
+    """
+
+    def __init__(self, buffer):
+        self._buf = buffer
+        magic, self.count, self.max_words, self._filter_bytes = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a gazetteer index (rebuild with scripts/build_gazetteer.py)")
+        self._filter_bits = self._filter_bytes * 8
+        self._offsets_at = _HEADER.size + self._filter_bytes
+
+    @classmethod
+    def open(cls, path: str) -> "Gazetteer":
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @classmethod
+    def from_csv(cls, path: str) -> "Gazetteer":
+        return cls(build_index(read_csv(path)))
+
+    def _offset(self, i: int) -> int:
+        return _OFFSET.unpack_from(self._buf, self._offsets_at + i * _OFFSET.size)[0]
+
+    def _may_start_name(self, word: bytes) -> bool:
+        bit = zlib.crc32(word) % self._filter_bits
+        return bool(self._buf[_HEADER.size + (bit >> 3)] & (1 << (bit & 7)))
+
+    def _key(self, i: int) -> bytes:
+        start = self._offset(i)
+        return self._buf[start:self._buf.find(_SEP, start)]
+
+    def _record(self, i: int) -> Tuple[bytes, City]:
+        start = self._offset(i)
+        end = self._buf.find(b"\n", start)
+        key, city_id, name = self._buf[start:end].split(_SEP)
+        return key, City(name.decode("utf-8"), city_id.decode("utf-8"))
+
+    def _lower_bound(self, key: bytes) -> int:
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _get(self, key: str) -> Optional[City]:
+        encoded = key.encode("utf-8")
+        i = self._lower_bound(encoded)
+        if i < self.count and self._key(i) == encoded:
+            return self._record(i)[1]
+        return None
+
+    def lookup(self, name: str) -> Optional[City]:
+        """Exact (normalized) lookup of a city name or alias"""
+        key = normalize(name)
+        return self._get(key) if key else None
+
+    def prefix(self, text: str, limit: int = 10) -> List[City]:
+        """Cities whose name or alias starts with ``text``"""
+        encoded = normalize(text).encode("utf-8")
+        matches: List[City] = []
+        i = self._lower_bound(encoded)
+        while i < self.count and len(matches) < limit:
+            key, city = self._record(i)
+            if not key.startswith(encoded):
+                break
+            if city not in matches:
+                matches.append(city)
+            i += 1
+        return matches
+
+    def find_in_text(self, text: str) -> Optional[City]:
+        """Longest city name mentioned in free text (leftmost on ties)"""
+        tokens = [t.encode("utf-8") for t in normalize(text).split()]
+        best, best_words = None, 0
+        for start, first in enumerate(tokens):
+            if not self._may_start_name(first):
+                continue
+            # One binary search per candidate; names starting with it are adjacent
+            phrase_prefix = first + b" "
+            i = self._lower_bound(first)
+            while i < self.count:
+                key = self._key(i)
+                if not key.startswith(first):
+                    break
+                if key == first or key.startswith(phrase_prefix):
+                    words = key.split(b" ")
+                    if len(words) > best_words and tokens[start:start + len(words)] == words:
+                        best, best_words = self._record(i)[1], len(words)
+                i += 1
+        return best
+
+
+_default: Optional[Gazetteer] = None
+_default_loaded = False
+_lock = threading.Lock()
+
+
+def load_default_gazetteer() -> Optional[Gazetteer]:
+    """Open the shared gazetteer, building the index from the CSV if needed
+
+    The index is rebuilt when it is missing, has an outdated format or is
+    older than the CSV.
+    """
+    global _default, _default_loaded
+    if _default_loaded:
+        return _default
+    with _lock:
+        if _default_loaded:
+            return _default
+        index_path = os.getenv("GAZETTEER_INDEX", DEFAULT_INDEX)
+        csv_path = os.getenv("GAZETTEER_CSV", DEFAULT_CSV)
+        try:
+            if os.path.exists(index_path):
+                if os.path.exists(csv_path) and os.path.getmtime(csv_path) > os.path.getmtime(index_path):
+                    logger.info(f"Rebuilding gazetteer index: {csv_path} changed since it was built")
+                else:
+                    try:
+                        _default = Gazetteer.open(index_path)
+                    except ValueError as e:
+                        logger.warning(f"Rebuilding outdated gazetteer index: {e}")
+            if _default is None and os.path.exists(csv_path):
+                data = build_index(read_csv(csv_path))
+                try:
+                    # Replace rather than overwrite: other processes may have the old index mapped
+                    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+                    with open(tmp_path, "wb") as f:
+                        f.write(data)
+                    os.replace(tmp_path, index_path)
+                    logger.info(f"Built gazetteer index at {index_path}")
+                    _default = Gazetteer.open(index_path)
+                except OSError as e:
+                    # Read-only filesystem: serve from memory instead
+                    logger.warning(f"Could not write gazetteer index: {e}")
+                    _default = Gazetteer(data)
+            if _default is not None:
+                logger.info(f"Gazetteer loaded with {_default.count} names")
+            else:
+                logger.warning("No gazetteer available; location resolution disabled")
+        except Exception as e:
+            logger.error(f"Failed to load gazetteer: {str(e)}")
+        _default_loaded = True
+        return _default
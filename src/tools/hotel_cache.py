@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (city id, checkin, checkout, guest count)
+HotelCacheKey = Tuple[str, str, Optional[str], int]
+
+
+class _Call:
+    """A synchronous in-flight fetch shared by concurrent callers"""
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class HotelSearchCache:
+    """Stale-while-revalidate cache for raw MakCorps search payloads
+
+    Entries younger than ``ttl`` are served directly. Entries older than that
+    but within ``ttl + stale_ttl`` are still served, and a single background
+    refresh is started for the key. Concurrent misses for the same key share
+    one upstream request. Failed fetches are never cached.
+    """
+
+    def __init__(self, ttl: float = 300.0, stale_ttl: float = 1800.0, max_entries: int = 2048):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[HotelCacheKey, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[HotelCacheKey, _Call] = {}
+        self._ainflight: Dict[HotelCacheKey, asyncio.Future] = {}
+        self._refreshing: set = set()
+        # The event loop only keeps weak references to tasks; hold refreshes until done
+        self._refresh_tasks: Set[asyncio.Task] = set()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="hotel-cache-refresh")
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def make_key(city_id: str, checkin: str, checkout: Optional[str], guest_count: int) -> HotelCacheKey:
+        return (str(city_id).strip().lower(), checkin, checkout, int(guest_count))
+
+    def _lookup(self, key: HotelCacheKey) -> Tuple[Optional[Any], bool]:
+        """Return (value, is_stale) or (None, False) on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, False
+            fetched_at, value = entry
+            age = time.monotonic() - fetched_at
+            if age > self.ttl + self.stale_ttl:
+                del self._entries[key]
+                self.misses += 1
+                return None, False
+            self._entries.move_to_end(key)
+            if age > self.ttl:
+                self.stale_hits += 1
+                return value, True
+            self.hits += 1
+            return value, False
+
+    def _store(self, key: HotelCacheKey, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_fetch(self, key: HotelCacheKey, fetch: Callable[[], Any]) -> Any:
+        value, stale = self._lookup(key)
+        if value is not None:
+            if stale:
+                self._refresh_in_background(key, fetch)
+            return value
+
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._inflight[key] = call
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fetch()
+            self._store(key, call.result)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.event.set()
+
+    def _refresh_in_background(self, key: HotelCacheKey, fetch: Callable[[], Any]) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._store(key, fetch())
+            except Exception as e:
+                logger.warning(f"Background hotel cache refresh failed for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._executor.submit(refresh)
+
+    async def aget_or_fetch(self, key: HotelCacheKey, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        value, stale = self._lookup(key)
+        if value is not None:
+            if stale:
+                self._arefresh_in_background(key, fetch)
+            return value
+
+        task = self._ainflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._afetch(key, fetch))
+            self._ainflight[key] = task
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def _afetch(self, key: HotelCacheKey, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            result = await fetch()
+            self._store(key, result)
+            return result
+        finally:
+            self._ainflight.pop(key, None)
+
+    def _arefresh_in_background(self, key: HotelCacheKey, fetch: Callable[[], Awaitable[Any]]) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        async def refresh():
+            try:
+                self._store(key, await fetch())
+            except Exception as e:
+                logger.warning(f"Background hotel cache refresh failed for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        task = asyncio.ensure_future(refresh())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced
+            }
+
+
+# Shared by BookingAPIClient and the LangChain search_hotels tool
+hotel_search_cache = HotelSearchCache(
+    ttl=float(os.getenv("HOTEL_CACHE_TTL_SECONDS", "300")),
+    stale_ttl=float(os.getenv("HOTEL_CACHE_STALE_SECONDS", "1800")),
+    max_entries=int(os.getenv("HOTEL_CACHE_MAX_ENTRIES", "2048"))
+)
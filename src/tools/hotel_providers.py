@@ -0,0 +1,291 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence
+
+from src import metrics
+from src.models.hotel_record import HotelRecord
+from .api_client import BookingAPIClient, simulated_hotels
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r"\W+")
+
+
+class LatencyTracker:
+    """Sliding window of recent successful call latencies"""
+
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float, min_samples: int = 20) -> Optional[float]:
+        """The ``q`` quantile, or None until ``min_samples`` calls were seen"""
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class HotelProvider(ABC):
+    """A hotel data source queried by MultiProviderHotelSearch
+
+    ``fallback`` providers (e.g. simulated data) are only used when no
+    primary provider returned hotels before the deadline. ``search`` calls
+    ``observe_latency`` with the duration of real upstream requests only;
+    providers that never call it are never hedged.
+    """
+    name = "provider"
+    fallback = False
+
+    @abstractmethod
+    def search_blocking(self, location: str, checkin: str, checkout: str, guest_count: int) -> List[HotelRecord]:
+        ...
+
+    @abstractmethod
+    async def search(
+        self,
+        location: str,
+        checkin: str,
+        checkout: str,
+        guest_count: int,
+        hedge: bool = False,
+        observe_latency: Optional[Callable[[float], None]] = None
+    ) -> List[HotelRecord]:
+        ...
+
+
+class MakCorpsProvider(HotelProvider):
+    name = "makcorps"
+
+    def __init__(self, client: Optional[BookingAPIClient] = None):
+        self.client = client or BookingAPIClient()
+
+    @property
+    def enabled(self) -> bool:
+        return not self.client.use_simulation
+
+    def search_blocking(self, location, checkin, checkout, guest_count):
+        return self.client.fetch_hotels(location, checkin, checkout, guest_count)
+
+    async def search(self, location, checkin, checkout, guest_count, hedge=False, observe_latency=None):
+        # A hedge must not join the slow in-flight request through the cache
+        return await self.client.afetch_hotels(
+            location, checkin, checkout, guest_count,
+            bypass_cache=hedge,
+            observe_latency=observe_latency
+        )
+
+
+class SimulatedProvider(HotelProvider):
+    name = "simulated"
+    fallback = True
+
+    def search_blocking(self, location, checkin, checkout, guest_count):
+        return simulated_hotels(location, checkin, checkout)
+
+    async def search(self, location, checkin, checkout, guest_count, hedge=False, observe_latency=None):
+        return simulated_hotels(location, checkin, checkout)
+
+
+def _next_day(date: str) -> str:
+    return (datetime.strptime(date, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+def _dedupe_key(hotel: HotelRecord) -> str:
+    return _NON_WORD.sub(" ", hotel.name.casefold()).strip()
+
+
+def merge_hotels(results: Sequence[List[HotelRecord]], limit: int) -> List[HotelRecord]:
+    """Merge provider results, keeping the cheaper offer for duplicate hotels
+
+    Results are given in provider priority order; duplicates are detected on
+    the normalized hotel name. The merged list is ordered by rating.
+    """
+    merged: Dict[str, HotelRecord] = {}
+    for hotels in results:
+        for hotel in hotels:
+            key = _dedupe_key(hotel)
+            existing = merged.get(key)
+            if existing is None:
+                merged[key] = hotel
+            elif (
+                isinstance(hotel.price, (int, float))
+                and isinstance(existing.price, (int, float))
+                and 0 < hotel.price < existing.price
+            ):
+                merged[key] = hotel
+    return sorted(merged.values(), key=lambda h: -(h.rating or 0))[:limit]
+
+
+class MultiProviderHotelSearch:
+    """Query several hotel providers concurrently under one deadline
+
+    Every provider is queried at once. When a provider has not answered
+    within its recent p95 latency, a second (hedged) request is sent and the
+    first answer wins. At the deadline, whatever arrived is merged and
+    de-duplicated; slower providers are abandoned (MakCorps still fills the
+    hotel cache in the background). Fallback providers are used only if no
+    primary provider produced hotels.
+
+    Exposes the same ``search_hotels``/``asearch_hotels`` interface as
+    BookingAPIClient, so it can be passed to TourismAgent as ``hotel_api``.
+    """
+
+    def __init__(
+        self,
+        providers: Sequence[HotelProvider],
+        deadline: float = 5.0,
+        hedge_quantile: float = 0.95,
+        hedge_min_samples: int = 20,
+        max_results: int = 20
+    ):
+        self.providers = list(providers)
+        self.deadline = deadline
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.max_results = max_results
+        self.latency = {p.name: LatencyTracker() for p in self.providers}
+        self.counts = {p.name: {"ok": 0, "error": 0, "timeout": 0, "hedged": 0} for p in self.providers}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _active(self) -> List[HotelProvider]:
+        return [p for p in self.providers if getattr(p, "enabled", True)]
+
+    def _response(self, results: Dict[HotelProvider, List[HotelRecord]], location, checkin, checkout) -> Dict[str, Any]:
+        primary = [results[p] for p in self.providers if p in results and not p.fallback]
+        hotels = merge_hotels(primary, self.max_results)
+        if not hotels:
+            hotels = merge_hotels([results[p] for p in self.providers if p in results and p.fallback], self.max_results)
+        return {
+            "status": "success",
+            "location": location,
+            "checkin": checkin,
+            "checkout": checkout,
+            "hotels": hotels
+        }
+
+    def search_hotels(
+        self,
+        location: str,
+        checkin_date: str,
+        checkout_date: Optional[str] = None,
+        guest_count: int = 2
+    ) -> Dict[str, Any]:
+        """Blocking variant: providers run on a thread pool under the same deadline, without hedging"""
+        checkout = checkout_date or _next_day(checkin_date)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=2 * len(self.providers), thread_name_prefix="hotel-provider")
+        futures = {
+            self._executor.submit(p.search_blocking, location, checkin_date, checkout, guest_count): p
+            for p in self._active()
+        }
+        done, pending = wait(futures, timeout=self.deadline)
+        results = {}
+        for future, provider in futures.items():
+            if future in pending:
+                self.counts[provider.name]["timeout"] += 1
+            elif future.exception() is not None:
+                self.counts[provider.name]["error"] += 1
+                logger.warning(f"Hotel provider {provider.name} failed: {future.exception()}")
+            else:
+                self.counts[provider.name]["ok"] += 1
+                results[provider] = future.result()
+        return self._response(results, location, checkin_date, checkout)
+
+    async def asearch_hotels(
+        self,
+        location: str,
+        checkin_date: str,
+        checkout_date: Optional[str] = None,
+        guest_count: int = 2
+    ) -> Dict[str, Any]:
+        checkout = checkout_date or _next_day(checkin_date)
+        deadline = time.monotonic() + self.deadline
+        tasks = {
+            p: asyncio.ensure_future(self._query(p, location, checkin_date, checkout, guest_count, deadline))
+            for p in self._active()
+        }
+        if tasks:
+            await asyncio.wait(tasks.values(), timeout=self.deadline)
+        results = {}
+        for provider, task in tasks.items():
+            if not task.done():
+                task.cancel()
+                self.counts[provider.name]["timeout"] += 1
+            elif task.exception() is None:
+                results[provider] = task.result()
+        return self._response(results, location, checkin_date, checkout)
+
+    async def _attempt(self, provider: HotelProvider, args, hedge: bool) -> List[HotelRecord]:
+        # Only upstream round trips are observed: cache hits would drag the
+        # hedge threshold towards zero and hedge every cache miss
+        return await provider.search(*args, hedge=hedge, observe_latency=self.latency[provider.name].observe)
+
+    async def _query(self, provider: HotelProvider, location, checkin, checkout, guest_count, deadline):
+        args = (location, checkin, checkout, guest_count)
+        counts = self.counts[provider.name]
+        attempts = [asyncio.ensure_future(self._attempt(provider, args, hedge=False))]
+        hedge_after = self.latency[provider.name].quantile(self.hedge_quantile, self.hedge_min_samples)
+        try:
+            if hedge_after is not None and hedge_after < deadline - time.monotonic():
+                done, _ = await asyncio.wait(attempts, timeout=hedge_after)
+                if not done:
+                    counts["hedged"] += 1
+                    metrics.HOTEL_HEDGES.inc(provider.name)
+                    attempts.append(asyncio.ensure_future(self._attempt(provider, args, hedge=True)))
+
+            error: Optional[BaseException] = None
+            remaining = set(attempts)
+            while remaining:
+                done, remaining = await asyncio.wait(remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        counts["ok"] += 1
+                        return task.result()
+                    error = task.exception()
+            counts["error"] += 1
+            logger.warning(f"Hotel provider {provider.name} failed: {error}")
+            raise error
+        finally:
+            for task in attempts:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            name: {
+                **counts,
+                "samples": len(self.latency[name]),
+                "p95_seconds": self.latency[name].quantile(0.95, 1)
+            }
+            for name, counts in self.counts.items()
+        }
+
+
+# Provider names accepted by HOTEL_PROVIDERS; register new sources here
+PROVIDERS = {
+    "makcorps": MakCorpsProvider,
+    "simulated": SimulatedProvider,
+}
+
+
+def create_hotel_search(names: Sequence[str], **kwargs) -> MultiProviderHotelSearch:
+    """Build a MultiProviderHotelSearch from provider names, in priority order"""
+    unknown = [name for name in names if name not in PROVIDERS]
+    if unknown:
+        raise ValueError(f"Unknown hotel providers: {', '.join(unknown)}")
+    return MultiProviderHotelSearch([PROVIDERS[name]() for name in names], **kwargs)
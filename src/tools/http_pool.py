@@ -0,0 +1,128 @@
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PoolConfig:
+    """Connection pool limits and timeouts shared by all outbound HTTP calls
+
+    ``max_connections_per_host`` is enforced on both paths: once it is
+    reached, further requests wait for a free connection. urllib3 has no
+    separate idle limit, so ``max_keepalive_per_host`` and
+    ``keepalive_expiry`` only apply to the async (httpx) clients; sync
+    sessions keep up to ``max_connections_per_host`` connections alive.
+    """
+    max_connections_per_host: int = 20
+    max_keepalive_per_host: int = 10
+    keepalive_expiry: float = 30.0
+    connect_timeout: float = 3.05
+    read_timeout: float = 15.0
+
+    @classmethod
+    def from_env(cls) -> "PoolConfig":
+        return cls(
+            max_connections_per_host=int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "20")),
+            max_keepalive_per_host=int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", "10")),
+            keepalive_expiry=float(os.getenv("HTTP_POOL_KEEPALIVE_EXPIRY", "30")),
+            connect_timeout=float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05")),
+            read_timeout=float(os.getenv("HTTP_READ_TIMEOUT", "15"))
+        )
+
+
+config = PoolConfig.from_env()
+
+_lock = threading.Lock()
+_sessions: Dict[str, requests.Session] = {}
+_async_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def _host_key(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def request_timeout(read: Optional[float] = None) -> Tuple[float, float]:
+    """(connect, read) timeout tuple for requests calls"""
+    return (config.connect_timeout, read if read is not None else config.read_timeout)
+
+
+def async_timeout(read: Optional[float] = None) -> httpx.Timeout:
+    """httpx timeout with the pool's connect timeout"""
+    return httpx.Timeout(
+        read if read is not None else config.read_timeout,
+        connect=config.connect_timeout
+    )
+
+
+def get_session(url: str) -> requests.Session:
+    """Return the keep-alive requests.Session pooled for the host of ``url``"""
+    key = _host_key(url)
+    session = _sessions.get(key)
+    if session is not None:
+        return session
+    with _lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            # pool_block: wait for a free connection rather than opening (and
+            # then discarding) extras beyond the limit
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=config.max_connections_per_host,
+                pool_block=True
+            )
+            session.mount(key, adapter)
+            _sessions[key] = session
+            logger.info(f"Created HTTP connection pool for {key}")
+        return session
+
+
+def mount_session(url: str, session) -> None:
+    """Use ``session`` for the host of ``url`` (stub transports in benchmarks/tests)"""
+    with _lock:
+        _sessions[_host_key(url)] = session
+
+
+def get_async_client(url: str) -> httpx.AsyncClient:
+    """Return the keep-alive httpx.AsyncClient pooled for the host of ``url``"""
+    key = _host_key(url)
+    client = _async_clients.get(key)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=config.max_connections_per_host,
+                max_keepalive_connections=config.max_keepalive_per_host,
+                keepalive_expiry=config.keepalive_expiry
+            ),
+            timeout=async_timeout()
+        )
+        _async_clients[key] = client
+        logger.info(f"Created async HTTP connection pool for {key}")
+    return client
+
+
+def close_all() -> None:
+    """Close pooled sync sessions"""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+async def aclose_all() -> None:
+    """Close every pooled connection, sync and async"""
+    clients = list(_async_clients.values())
+    _async_clients.clear()
+    for client in clients:
+        await client.aclose()
+    close_all()
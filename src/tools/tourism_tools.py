@@ -1,33 +1,18 @@
 from langchain.tools import tool
-import requests
 import os
 import logging
 import json
+from .hotel_cache import hotel_search_cache
+from . import http_pool
+from .circuit_breaker import CircuitOpenError, get_breaker
+from src import metrics
+from src.feedback.firebase_store import init_firebase
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Conditional Firebase import
-try:
-    from firebase_admin import credentials, initialize_app
-    has_firebase = True
-except ImportError:
-    has_firebase = False
-    logger.warning("Firebase Admin SDK not installed. Firebase features disabled")
-
-# Initialize Firebase if available
-if has_firebase and os.getenv("FIREBASE_CREDENTIALS"):
-    try:
-        firebase_creds = json.loads(os.getenv("FIREBASE_CREDENTIALS"))
-        cred = credentials.Certificate(firebase_creds)
-        initialize_app(cred)
-        logger.info("Firebase initialized successfully")
-    except Exception as e:
-        logger.error(f"Firebase initialization failed: {str(e)}")
-        has_firebase = False
-else:
-    logger.info("Firebase not configured or not installed")
+MAKCORPS_URL = "https://api.makcorps.com/city"
 
 @tool
 def search_hotels(location: str, checkin_date: str) -> str:
@@ -46,17 +31,29 @@ def search_hotels(location: str, checkin_date: str) -> str:
             "adults": 2
         }
         
-        # API call with timeout
-        response = requests.get(
-            "https://api.makcorps.com/city",
-            params=params,
-            timeout=10
-        )
-        response.raise_for_status()
-        data = response.json()
+        # API call with timeout, shared with BookingAPIClient through the cache
+        # and the MakCorps circuit breaker
+        def request(timeout: float):
+            with metrics.track_outbound("makcorps"):
+                response = http_pool.get_session(MAKCORPS_URL).get(
+                    MAKCORPS_URL,
+                    params=params,
+                    timeout=http_pool.request_timeout(timeout)
+                )
+                if response.status_code >= 500:
+                    response.raise_for_status()
+                return response
+
+        def fetch():
+            response = get_breaker("makcorps").call(request)
+            response.raise_for_status()
+            return response.json()
+
+        key = hotel_search_cache.make_key(city_id, checkin_date, None, params["adults"])
+        data = hotel_search_cache.get_or_fetch(key, fetch)
         
         # Log to Firebase if available
-        if has_firebase:
+        if init_firebase():
             try:
                 # Add Firebase logging here if needed
                 pass
@@ -80,6 +77,8 @@ def search_hotels(location: str, checkin_date: str) -> str:
         
         return "\n\n".join(hotels) if hotels else "No hotels found"
             
+    except CircuitOpenError:
+        return "Hotel search is temporarily unavailable. Please try again in a few minutes."
     except Exception as e:
         logger.error(f"Hotel search error: {str(e)}")
         return "Couldn't retrieve hotels. Please try different parameters."
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from src.routers import admission as admission_module
+from src.routers.admission import AdmissionController, AdmissionRejected, generation_slot
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(admission_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_bucket_allows_burst_then_rate_limits(clock):
+    admission = AdmissionController(rate_per_minute=60, burst=3)
+    for _ in range(3):
+        admission.admit("web:a", "web")
+    with pytest.raises(AdmissionRejected) as rejected:
+        admission.admit("web:a", "web")
+    assert rejected.value.status_code == 429
+    assert rejected.value.headers == {"Retry-After": "1"}
+    # Other senders have their own bucket
+    admission.admit("web:b", "web")
+
+
+def test_sender_is_notified_once_per_bucket_window(clock):
+    admission = AdmissionController(rate_per_minute=60, burst=1)
+    admission.admit("telegram:1", "telegram")
+    notices = []
+    for _ in range(3):
+        with pytest.raises(AdmissionRejected) as rejected:
+            admission.admit("telegram:1", "telegram")
+        notices.append(rejected.value.notify)
+    assert notices == [True, False, False]
+
+    clock[0] += 1.0
+    admission.admit("telegram:1", "telegram")
+    with pytest.raises(AdmissionRejected) as rejected:
+        admission.admit("telegram:1", "telegram")
+    assert rejected.value.notify
+
+
+def test_least_recently_seen_senders_are_evicted(clock):
+    admission = AdmissionController(burst=1, max_keys=2)
+    for key in ("a", "b", "c"):
+        admission.admit(key, "web")
+    assert list(admission._buckets) == ["b", "c"]
+    # An evicted sender starts again with a full bucket
+    admission.admit("a", "web")
+
+
+def test_generations_are_capped_and_excess_is_shed():
+    admission = AdmissionController(max_in_flight=2, max_queue=1, queue_timeout=5.0)
+    peak = [0]
+
+    async def generate():
+        async with admission.generation("web"):
+            peak[0] = max(peak[0], admission.stats()["in_flight"])
+            await asyncio.sleep(0.02)
+
+    async def main():
+        tasks = [asyncio.ensure_future(generate()) for _ in range(3)]
+        # Two generations running and one waiting: new messages are shed
+        for _ in range(10):
+            await asyncio.sleep(0)
+        assert admission.overloaded
+        with pytest.raises(AdmissionRejected) as rejected:
+            admission.admit("web:late", "web")
+        assert rejected.value.status_code == 503
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert peak[0] == 2
+    assert admission.stats()["in_flight"] == 0
+    assert admission.rejected == {"rate_limited": 0, "overloaded": 1}
+
+
+def test_queue_wait_times_out():
+    admission = AdmissionController(max_in_flight=1, queue_timeout=0.01)
+
+    async def main():
+        await admission.acquire("batch")
+        with pytest.raises(AdmissionRejected):
+            await admission.acquire("batch")
+        admission.release()
+
+    asyncio.run(main())
+    assert admission.stats()["waiting"] == 0
+
+
+def test_generation_slot_is_a_no_op_without_admission():
+    async def main():
+        async with generation_slot(None, "batch"):
+            return True
+
+    assert asyncio.run(main())
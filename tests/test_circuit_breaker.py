@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from src.tools.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+def fail(timeout):
+    raise ConnectionError("down")
+
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+    assert breaker.state == OPEN
+
+
+def test_opens_after_consecutive_failures_and_rejects_fast():
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=60.0)
+    trip(breaker)
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda timeout: calls.append(timeout))
+    assert calls == []
+    assert breaker.rejected == 1
+
+
+def test_half_open_lets_exactly_one_probe_through():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0.0)
+    trip(breaker)
+
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    # Concurrent callers are rejected while the probe is outstanding
+    assert not breaker.allow()
+
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_the_circuit():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0.0)
+    trip(breaker)
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == OPEN
+    assert breaker.opened == 2
+
+
+def test_cancelled_probe_is_released():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.0)
+    trip(breaker)
+
+    async def slow(timeout):
+        await asyncio.sleep(10)
+
+    async def main():
+        task = asyncio.ensure_future(breaker.acall(slow))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+
+
+def test_timeout_adapts_to_observed_latency():
+    breaker = CircuitBreaker("test", max_timeout=30.0, min_timeout=0.5, min_samples=5)
+    for _ in range(4):
+        breaker.record_success(1.0)
+    assert breaker.timeout() == 30.0
+    breaker.record_success(1.0)
+    assert breaker.timeout() == 2.0
@@ -0,0 +1,85 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.agents.completion_cache import CompletionCache
+from conftest import wait_for
+
+
+PARAMS = {"max_new_tokens": 256, "temperature": 0.7}
+
+
+def test_key_ignores_whitespace_and_case_but_not_params():
+    key = CompletionCache.make_key("Hotels in  Paris ", PARAMS)
+    assert key == CompletionCache.make_key("hotels in paris", PARAMS)
+    assert key != CompletionCache.make_key("hotels in paris", {**PARAMS, "temperature": 0.1})
+
+
+def test_concurrent_sync_misses_share_one_generation():
+    cache = CompletionCache()
+    release = threading.Event()
+    calls = []
+
+    def generate():
+        calls.append(1)
+        release.wait(2.0)
+        return "answer"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_generate("q", PARAMS, generate)))
+        for _ in range(5)
+    ]
+    for t in threads:
+        t.start()
+    # Let every caller reach the in-flight call before the leader finishes
+    assert wait_for(lambda: cache.coalesced == 4)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert results == ["answer"] * 5
+    assert len(calls) == 1
+    assert cache.get_or_generate("q", PARAMS, generate) == "answer"
+    assert len(calls) == 1
+
+
+def test_concurrent_async_misses_share_one_generation():
+    cache = CompletionCache()
+    calls = []
+
+    async def generate():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def main():
+        return await asyncio.gather(*(cache.aget_or_generate("q", PARAMS, generate) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["answer"] * 5
+    assert len(calls) == 1
+    assert cache.coalesced == 4
+
+
+def test_failed_generation_is_not_cached():
+    cache = CompletionCache()
+
+    def fail():
+        raise RuntimeError("llm down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_generate("q", PARAMS, fail)
+    assert cache.get_or_generate("q", PARAMS, lambda: "answer") == "answer"
+
+
+def test_entries_are_evicted_least_recently_used_first():
+    cache = CompletionCache(max_entries=2)
+    for prompt in ("a", "b"):
+        cache.get_or_generate(prompt, PARAMS, lambda: prompt)
+    cache.get(CompletionCache.make_key("a", PARAMS))
+    cache.get_or_generate("c", PARAMS, lambda: "c")
+
+    assert cache.get(CompletionCache.make_key("b", PARAMS)) is None
+    assert cache.get(CompletionCache.make_key("a", PARAMS)) == "a"
+    assert cache.evictions == 1
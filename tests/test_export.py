@@ -0,0 +1,101 @@
+import glob
+import json
+import os
+
+import pytest
+
+from src.feedback.export import ExportConfig, RLHFExporter
+from src.feedback.local_store import JSONLBackend
+
+
+class CrashingBackend:
+    """Streams the wrapped backend but raises after ``crash_after`` records"""
+
+    def __init__(self, backend, crash_after):
+        self.backend = backend
+        self.crash_after = crash_after
+
+    def iter_records(self, cursor=None):
+        for i, item in enumerate(self.backend.iter_records(cursor)):
+            if i == self.crash_after:
+                raise ConnectionError("backend went away")
+            yield item
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = JSONLBackend(str(tmp_path / "feedback.jsonl"))
+    records = []
+    for p in range(40):
+        for r in range(3):
+            records.append({
+                "id": f"{p}-{r}",
+                "message": f"Hotels in city {p}?",
+                "response": f"answer {r}",
+                "rating": "up" if r == 0 else "down",
+                "timestamp": p * 10 + r
+            })
+    backend.write_batch(records)
+    return backend
+
+
+def outputs(directory):
+    rows = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*-p*.jsonl"))):
+        name = os.path.basename(path).split("-p")[0]
+        with open(path, encoding="utf-8") as f:
+            rows.setdefault(name, []).extend(json.loads(line) for line in f)
+    return {name: sorted(map(json.dumps, r)) for name, r in rows.items()}
+
+
+def config(directory, **overrides):
+    return ExportConfig(output_dir=str(directory), partitions=4, shard_size=5, checkpoint_every=7, **overrides)
+
+
+def test_export_resumes_after_crash_with_identical_output(tmp_path, backend):
+    expected = RLHFExporter(backend, config(tmp_path / "clean")).run()
+
+    with pytest.raises(ConnectionError):
+        RLHFExporter(CrashingBackend(backend, 50), config(tmp_path / "resumed")).run()
+    resumed = RLHFExporter(backend, config(tmp_path / "resumed")).run()
+
+    assert resumed["counts"] == expected["counts"]
+    assert resumed["records"] == 120
+    assert outputs(tmp_path / "resumed") == outputs(tmp_path / "clean")
+    assert not os.path.exists(tmp_path / "resumed" / "_spill")
+
+
+def test_oversized_partitions_are_resplit_without_changing_output(tmp_path, backend):
+    RLHFExporter(backend, config(tmp_path / "whole")).run()
+    RLHFExporter(backend, config(tmp_path / "split", max_partition_records=10)).run()
+
+    assert outputs(tmp_path / "split") == outputs(tmp_path / "whole")
+    assert not glob.glob(os.path.join(tmp_path, "split", "_spill", "*"))
+
+
+def test_reset_keeps_unrelated_files(tmp_path, backend):
+    out = tmp_path / "out"
+    exporter = RLHFExporter(backend, config(out))
+    exporter.run()
+    (out / "notes.txt").write_text("keep me")
+
+    exporter.reset()
+
+    assert os.listdir(out) == ["notes.txt"]
+
+
+def test_malformed_line_mid_file_is_skipped_not_the_end(tmp_path):
+    backend = JSONLBackend(str(tmp_path / "feedback.jsonl"))
+    record = {"message": "Hotels in Rome?", "response": "answer", "rating": "up"}
+    backend.write_batch([{"id": "a", **record}])
+    with open(backend.path, "a", encoding="utf-8") as f:
+        f.write('{"id": "torn", "mess\n')
+    backend.write_batch([{"id": i, **record} for i in ("b", "c")])
+    with open(backend.path, "a", encoding="utf-8") as f:
+        f.write('{"id": "d", "mess')
+
+    assert [r["id"] for _, r in backend.iter_records()] == ["a", "b", "c"]
+    assert backend.malformed == 1
+
+    manifest = RLHFExporter(backend, config(tmp_path / "out")).run()
+    assert manifest["records"] == 3
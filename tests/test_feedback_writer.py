@@ -0,0 +1,132 @@
+import glob
+import os
+
+import pytest
+
+from src.feedback.local_store import JSONLBackend, SQLiteBackend
+from src.feedback.writer import FeedbackWriter
+from conftest import wait_for
+
+
+class FlakyBackend:
+    """Fails every write_batch until ``healthy`` is set"""
+
+    def __init__(self):
+        self.healthy = False
+        self.records = []
+
+    def write_batch(self, records):
+        if not self.healthy:
+            raise ConnectionError("backend down")
+        self.records.extend(records)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(params=["jsonl", "sqlite"])
+def backend_factory(request, tmp_path):
+    path = str(tmp_path / f"feedback.{request.param}")
+    return lambda: JSONLBackend(path) if request.param == "jsonl" else SQLiteBackend(path)
+
+
+def feedback(i):
+    return {"message": f"question {i}", "response": f"answer {i}", "rating": "up"}
+
+
+def test_crash_before_flush_is_replayed_on_next_start(tmp_path, backend_factory):
+    journal = str(tmp_path / "feedback.journal")
+    crashed = FeedbackWriter(backend_factory(), journal_path=journal, max_batch=1000, flush_interval=3600)
+    crashed.start()
+    ids = [crashed.record(feedback(i)) for i in range(5)]
+    # Simulated crash: the writer is abandoned without close(), a torn line at the end
+    with open(glob.glob(journal + ".*")[0], "a", encoding="utf-8") as f:
+        f.write('{"id": "torn", "mess')
+
+    backend = backend_factory()
+    writer = FeedbackWriter(backend, journal_path=journal, flush_interval=3600)
+    writer.start()
+    writer.close()
+
+    stored = backend_factory().read()
+    assert sorted(r["id"] for r in stored) == sorted(ids)
+    assert not glob.glob(journal + ".*")
+
+
+def test_replay_after_partial_flush_does_not_duplicate(tmp_path, backend_factory):
+    journal = str(tmp_path / "feedback.journal")
+    writer = FeedbackWriter(backend_factory(), journal_path=journal, flush_interval=3600)
+    writer.start()
+    ids = [writer.record(feedback(i)) for i in range(3)]
+    # Crash after the backend accepted the batch but before its segment was deleted
+    segment = glob.glob(journal + ".*")[0]
+    backend_factory().write_batch(list(writer._buffer))
+
+    replay = FeedbackWriter(backend_factory(), journal_path=journal, flush_interval=3600)
+    replay.start()
+    replay.close()
+
+    stored = backend_factory().read()
+    assert sorted(r["id"] for r in stored) == sorted(ids)
+    assert not os.path.exists(segment)
+
+
+def test_failed_flush_keeps_journal_until_backend_recovers(tmp_path):
+    journal = str(tmp_path / "feedback.journal")
+    flaky = FlakyBackend()
+    writer = FeedbackWriter(flaky, journal_path=journal, flush_interval=3600)
+    writer.start()
+    ids = [writer.record(feedback(i)) for i in range(4)]
+    writer.close()
+    assert writer.failed_flushes >= 1
+    assert flaky.records == []
+    assert glob.glob(journal + ".*")
+
+    flaky.healthy = True
+    recovered = FeedbackWriter(flaky, journal_path=journal, flush_interval=3600)
+    recovered.start()
+    recovered.close()
+    assert sorted(r["id"] for r in flaky.records) == sorted(ids)
+    assert not glob.glob(journal + ".*")
+
+
+def test_batch_is_flushed_when_full(tmp_path):
+    backend = FlakyBackend()
+    backend.healthy = True
+    writer = FeedbackWriter(backend, journal_path=str(tmp_path / "j"), max_batch=3, flush_interval=3600)
+    writer.start()
+    for i in range(3):
+        writer.record(feedback(i))
+    assert wait_for(lambda: len(backend.records) == 3)
+    writer.close()
+    assert writer.stats()["flushed"] == 3
+
+
+def test_memory_backlog_is_bounded_without_journal():
+    flaky = FlakyBackend()
+    writer = FeedbackWriter(flaky, max_batch=10, max_pending=5)
+    for round_ in range(3):
+        for i in range(3):
+            writer.record(feedback(round_ * 3 + i))
+        writer.flush()
+    assert writer.dropped > 0
+    assert sum(len(records) for _, records in writer._pending) <= 5
+
+
+def test_replay_after_torn_backend_write_keeps_every_record(tmp_path):
+    journal = str(tmp_path / "feedback.journal")
+    path = str(tmp_path / "feedback.jsonl")
+    JSONLBackend(path).write_batch([{"id": "earlier", **feedback(0)}])
+    crashed = FeedbackWriter(JSONLBackend(path), journal_path=journal, flush_interval=3600)
+    crashed.start()
+    ids = [crashed.record(feedback(i)) for i in range(3)]
+    # Crash half-way through the backend write: the file ends in a partial line
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(f'{{"id": "{ids[0]}", "mess')
+
+    replay = FeedbackWriter(JSONLBackend(path), journal_path=journal, flush_interval=3600)
+    replay.start()
+    replay.close()
+
+    stored = JSONLBackend(path).read()
+    assert sorted(r["id"] for r in stored) == sorted(ids + ["earlier"])
@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+from src.tools import gazetteer
+
+
+@pytest.fixture
+def load(monkeypatch, tmp_path):
+    csv_path, index_path = tmp_path / "gazetteer.csv", tmp_path / "gazetteer.idx"
+    monkeypatch.setenv("GAZETTEER_CSV", str(csv_path))
+    monkeypatch.setenv("GAZETTEER_INDEX", str(index_path))
+
+    def load_fresh():
+        monkeypatch.setattr(gazetteer, "_default", None)
+        monkeypatch.setattr(gazetteer, "_default_loaded", False)
+        return gazetteer.load_default_gazetteer()
+
+    return csv_path, index_path, load_fresh
+
+
+def test_index_is_built_from_csv_and_reused(load):
+    csv_path, index_path, load_fresh = load
+    csv_path.write_text("name,aliases,city_id\nParis,City of Light,1\n", encoding="utf-8")
+
+    assert load_fresh().lookup("city of light").city_id == "1"
+    built_at = os.path.getmtime(index_path)
+    assert load_fresh().lookup("paris").city_id == "1"
+    assert os.path.getmtime(index_path) == built_at
+
+
+def test_index_is_rebuilt_when_csv_changes(load):
+    csv_path, index_path, load_fresh = load
+    csv_path.write_text("name,aliases,city_id\nParis,,1\n", encoding="utf-8")
+    load_fresh()
+    csv_path.write_text("name,aliases,city_id\nParis,,1\nRome,Roma,2\n", encoding="utf-8")
+    built_at = os.path.getmtime(index_path)
+    os.utime(csv_path, (built_at + 10, built_at + 10))
+
+    assert load_fresh().lookup("roma").city_id == "2"
+    assert not list(index_path.parent.glob("*.tmp"))
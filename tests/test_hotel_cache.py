@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from src.tools.hotel_cache import HotelSearchCache
+
+
+KEY = HotelSearchCache.make_key(" Paris ", "2026-11-01", "2026-11-03", 2)
+
+
+def test_key_normalizes_city_id():
+    assert KEY == HotelSearchCache.make_key("paris", "2026-11-01", "2026-11-03", "2")
+
+
+def test_concurrent_async_misses_share_one_upstream_request():
+    cache = HotelSearchCache()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return ["hotel"]
+
+    async def main():
+        return await asyncio.gather(*(cache.aget_or_fetch(KEY, fetch) for _ in range(4)))
+
+    assert asyncio.run(main()) == [["hotel"]] * 4
+    assert len(calls) == 1
+    assert cache.stats()["coalesced"] == 3
+
+
+def test_stale_entry_is_served_and_refreshed_once_in_background():
+    # ttl=0: every stored entry is immediately stale but still servable
+    cache = HotelSearchCache(ttl=0.0, stale_ttl=60.0)
+    fetched = []
+
+    async def fetch():
+        fetched.append(1)
+        await asyncio.sleep(0.01)
+        return [f"v{len(fetched)}"]
+
+    async def main():
+        first = await cache.aget_or_fetch(KEY, fetch)
+        stale = await asyncio.gather(*(cache.aget_or_fetch(KEY, fetch) for _ in range(3)))
+        assert len(cache._refresh_tasks) == 1
+        await asyncio.gather(*cache._refresh_tasks)
+        return first, stale
+
+    first, stale = asyncio.run(main())
+    assert first == ["v1"]
+    assert stale == [["v1"]] * 3
+    assert len(fetched) == 2
+    assert cache.stale_hits == 3
+    assert not cache._refresh_tasks
+    assert cache._entries[KEY][1] == ["v2"]
+
+
+def test_failed_fetch_is_not_cached():
+    cache = HotelSearchCache()
+
+    def fail():
+        raise ConnectionError("upstream down")
+
+    with pytest.raises(ConnectionError):
+        cache.get_or_fetch(KEY, fail)
+    assert cache.get_or_fetch(KEY, lambda: ["hotel"]) == ["hotel"]
+    assert cache.get_or_fetch(KEY, fail) == ["hotel"]
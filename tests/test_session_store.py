@@ -0,0 +1,36 @@
+import tracemalloc
+
+from src.agents.session_store import SessionStore
+
+
+def test_byte_cap_bounds_real_memory_of_many_short_sessions():
+    store = SessionStore(max_bytes=1024 * 1024)
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        for i in range(20_000):
+            store.append(f"web:session-{i:08d}", "hi", "hello")
+        used = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    assert store.stats()["bytes"] <= store.max_bytes
+    assert store.evictions > 0
+    assert used < 1.25 * store.max_bytes
+
+
+def test_bytes_return_to_zero_when_sessions_are_cleared():
+    store = SessionStore(max_turns=2)
+    for turn in range(5):
+        store.append("a", f"question {turn}", "answer")
+        store.append("b", "question", "answer")
+    assert [q for q, _ in store.history("a")] == ["question 3", "question 4"]
+    store.clear("a")
+    store.clear("b")
+    assert store.stats()["bytes"] == 0
+
+
+def test_zero_max_turns_keeps_no_history():
+    store = SessionStore(max_turns=0)
+    store.append("a", "question", "answer")
+    assert store.history("a") == []
+    assert store.stats()["sessions"] == 0
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from src.routers.dedupe import WebhookDedupe
+
+
+def test_redelivery_gets_the_original_result():
+    dedupe = WebhookDedupe("test")
+
+    async def main():
+        assert dedupe.begin("m1") is None
+        original = dedupe.begin("m1")
+        assert not original.done()
+        dedupe.finish("m1", "<Response/>")
+        return await original
+
+    assert asyncio.run(main()) == "<Response/>"
+    assert dedupe.duplicates == 1
+
+
+def test_failed_delivery_is_processed_again():
+    dedupe = WebhookDedupe("test")
+
+    async def main():
+        dedupe.begin("m1")
+        waiting = dedupe.begin("m1")
+        dedupe.fail("m1")
+        with pytest.raises(RuntimeError):
+            await waiting
+        return dedupe.begin("m1")
+
+    assert asyncio.run(main()) is None
+
+
+def test_entries_expire_and_are_bounded():
+    async def main():
+        expired = WebhookDedupe("test", ttl=0.0)
+        expired.begin("m1")
+        bounded = WebhookDedupe("test", max_entries=2)
+        for key in ("m1", "m2", "m3"):
+            bounded.begin(key)
+        return expired.begin("m1"), bounded.begin("m1"), bounded.stats()
+
+    expired, evicted, stats = asyncio.run(main())
+    assert expired is None
+    assert evicted is None
+    assert stats["entries"] == 2
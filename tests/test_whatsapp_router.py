@@ -0,0 +1,98 @@
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("twilio")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.routers.dedupe import WebhookDedupe
+from src.routers.twilio_sender import FakeSender
+from src.routers.whatsapp import FALLBACK_REPLY, create_whatsapp_router
+from conftest import wait_for
+
+
+class StubAgent:
+    def __init__(self, followup=None, error=None):
+        self.calls = []
+        self.followup = followup
+        self.error = error
+
+    async def aprocess_message(self, message, session_id=None, channel="web"):
+        self.calls.append((message, session_id, channel))
+        if self.error is not None:
+            raise self.error
+        return {"response": f"reply to {message}", "hotels": [], "followup": self.followup}
+
+
+def make_client(agent, sender, **options):
+    app = FastAPI()
+    app.include_router(create_whatsapp_router(agent, async_replies=True, sender=sender, **options))
+    return TestClient(app)
+
+
+def post(client, body, sender="whatsapp:+15550001", sid=None):
+    data = {"From": sender, "Body": body}
+    if sid is not None:
+        data["MessageSid"] = sid
+    return client.post("/whatsapp/webhook", data=data)
+
+
+def test_async_reply_is_acked_with_empty_twiml_and_sent_through_sender():
+    agent, sender = StubAgent(), FakeSender()
+    with make_client(agent, sender) as client:
+        response = post(client, "Hotels in Paris")
+        assert response.status_code == 200
+        assert "<Message>" not in response.text
+        assert wait_for(lambda: sender.sent)
+    assert sender.sent == [{"to": "whatsapp:+15550001", "body": "reply to Hotels in Paris"}]
+    assert agent.calls == [("Hotels in Paris", "whatsapp:+15550001", "whatsapp")]
+
+
+def test_deferred_summary_is_sent_as_second_message():
+    async def followup():
+        return "summary"
+
+    sender = FakeSender()
+    with make_client(StubAgent(followup=followup), sender) as client:
+        post(client, "Hotels in Rome")
+        assert wait_for(lambda: len(sender.sent) == 2)
+    assert [m["body"] for m in sender.sent] == ["reply to Hotels in Rome", "summary"]
+
+
+def test_empty_summary_is_not_sent():
+    async def followup():
+        return None
+
+    sender = FakeSender()
+    with make_client(StubAgent(followup=followup), sender) as client:
+        post(client, "Hotels in Rome")
+        assert wait_for(lambda: sender.sent)
+        # Give the follow-up job time to run
+        wait_for(lambda: len(sender.sent) > 1, timeout=0.2)
+    assert [m["body"] for m in sender.sent] == ["reply to Hotels in Rome"]
+
+
+def test_agent_failure_sends_fallback_reply():
+    sender = FakeSender()
+    with make_client(StubAgent(error=RuntimeError("boom")), sender) as client:
+        assert post(client, "Hi").status_code == 200
+        assert wait_for(lambda: sender.sent)
+    assert sender.sent[0]["body"] == FALLBACK_REPLY
+
+
+def test_async_replies_require_a_sender():
+    with pytest.raises(ValueError):
+        create_whatsapp_router(StubAgent(), async_replies=True)
+
+
+def test_redelivered_message_is_answered_once():
+    agent, sender = StubAgent(), FakeSender()
+    with make_client(agent, sender, dedupe=WebhookDedupe("whatsapp")) as client:
+        first = post(client, "Hotels in Paris", sid="SM1")
+        second = post(client, "Hotels in Paris", sid="SM1")
+        assert wait_for(lambda: sender.sent)
+        wait_for(lambda: len(sender.sent) > 1, timeout=0.2)
+    assert first.text == second.text
+    assert len(agent.calls) == 1
+    assert len(sender.sent) == 1